@@ -10,6 +10,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, OAuth2Pas
 from pydantic import BaseModel, Field
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
+from functools import cached_property
 import secrets
 import hashlib
 import os
@@ -65,6 +66,11 @@ class User(BaseModel):
     
     class Config:
         from_attributes = True
+    
+    @cached_property
+    def id_str(self) -> str:
+        """字符串形式的用户ID（交易管理器以字符串为键）"""
+        return str(self.id)
 
 # ============================================================================
 # 用户验证（使用真实数据库）
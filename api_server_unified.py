@@ -223,12 +223,18 @@ if __name__ == "__main__":
     print(f"🔐 默认登录: admin / admin123")
     print("="*60 + "\n")
     
+    # 事件循环与 HTTP 解析器由 uvicorn 自动选择（已安装 uvloop/httptools 时自动使用）
     uvicorn.run(
         app,
         host="0.0.0.0",
         port=8000,
         log_level="info",
-        access_log=True
+        access_log=True,
+        # WebSocket 心跳由协议层 PING/PONG 完成，应用层无需再轮询超时
+        ws_ping_interval=30.0,
+        ws_ping_timeout=10.0,
+        # 推送帧多为 1KB 以下的 msgpack/JSON，压缩几乎不减小体积却要在事件循环里跑 zlib
+        ws_per_message_deflate=False
     )
 
 
@@ -31,6 +31,7 @@ logger = logging.getLogger(__name__)
 
 # 数据库
 from database_models import get_db, Configuration
+from trading_runtime_config import invalidate_runtime_config
 from sqlalchemy.orm import Session
 from fastapi import Request
 
@@ -65,7 +66,7 @@ async def get_current_user_or_guest(
 # ============================================================================
 
 # 导入超安全加密系统
-from ultra_security import encrypt_api_key, decrypt_api_key
+from ultra_security import encrypt_api_key, decrypt_api_key, encrypt_api_key_async
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
 
@@ -91,6 +92,14 @@ class ConfigEncryption:
             logging.error(f"加密失败: {e}")
             raise
     
+    async def encrypt_async(self, text: str) -> str:
+        """加密（在工作线程中执行，供异步接口使用）"""
+        try:
+            return await encrypt_api_key_async(text)
+        except Exception as e:
+            logging.error(f"加密失败: {e}")
+            raise
+    
     def decrypt(self, encrypted_text: str) -> str:
         """7层解密"""
         try:
@@ -675,7 +684,7 @@ async def update_config_category(
             
             # 敏感信息加密
             if category in ["deepseek", "bybit"] and any(keyword in key.lower() for keyword in SENSITIVE_KEYWORDS):
-                value = crypto.encrypt(str(value))
+                value = await crypto.encrypt_async(str(value))
             
             if config_entry:
                 # 更新现有配置
@@ -695,6 +704,7 @@ async def update_config_category(
             updated_keys.append(key)
         
         db.commit()
+        invalidate_runtime_config(current_user_obj.id)
         
         # 更新环境变量
         if category == "deepseek":
@@ -843,6 +853,8 @@ async def handle_bybit_update(
         db.rollback()
         raise
 
+    invalidate_runtime_config(user_id)
+
     if active_environment is not None:
         os.environ["BYBIT_ACTIVE_ENVIRONMENT"] = active_environment.value
 
@@ -977,7 +989,7 @@ async def _update_config_internal(
         
         # 敏感信息加密
         if category in ["deepseek", "bybit"] and any(keyword in key.lower() for keyword in SENSITIVE_KEYWORDS):
-            value = crypto.encrypt(str(value))
+            value = await crypto.encrypt_async(str(value))
         
         if config_entry:
             # 更新
@@ -997,6 +1009,7 @@ async def _update_config_internal(
         updated_keys.append(key)
     
     db.commit()
+    invalidate_runtime_config(user_id)
     
     if category == "deepseek":
         if "api_key" in config:
@@ -1165,6 +1178,7 @@ async def delete_config(
         
         db.delete(config_entry)
         db.commit()
+        invalidate_runtime_config(current_user_obj.id)
         
         return {
             "success": True,
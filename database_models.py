@@ -4,9 +4,15 @@
 """
 
 from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, JSON, Text, ForeignKey, UniqueConstraint
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime, timedelta
+from functools import cached_property
+from typing import AsyncIterator
+import functools
 import os
 
 # 数据库连接配置
@@ -21,10 +27,36 @@ if "your_password" in DATABASE_URL:
 else:
     print("[database_models] ✅ DATABASE_URL 已从环境变量加载")
 
-engine = create_engine(DATABASE_URL, pool_size=10, max_overflow=20)
+# 连接池：常驻20个连接 + 10个溢出，预检测断线并定期回收，避免高并发下 QueuePool 耗尽
+engine = create_engine(
+    DATABASE_URL,
+    pool_size=20,
+    max_overflow=10,
+    pool_timeout=30,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# 异步引擎（asyncpg 驱动），供 async 路由使用，避免同步查询阻塞事件循环
+# 高频短查询不做 pre-ping（省一次往返），断线由 retry_on_disconnect 重连重试
+ASYNC_DATABASE_URL = make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
+try:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_size=20,
+        max_overflow=10,
+        pool_timeout=30,
+        pool_pre_ping=False,
+        pool_recycle=1800,
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+except ImportError:
+    async_engine = None
+    AsyncSessionLocal = None
+    print("[database_models] ⚠️ 未安装 asyncpg，异步数据库会话不可用")
+
 # ============================================================================
 # 数据库模型
 # ============================================================================
@@ -276,6 +308,11 @@ class User(Base):
     def is_active(self, value):
         self.account_locked = not value
     
+    @cached_property
+    def id_str(self) -> str:
+        """字符串形式的用户ID（交易管理器以字符串为键）"""
+        return str(self.id)
+    
     # 关系
     api_keys = relationship("APIKey", back_populates="user", uselist=False)
 
@@ -337,6 +374,32 @@ def get_db():
         db.close()
 
 
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """获取异步数据库会话"""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("异步数据库会话不可用，请安装 asyncpg")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def retry_on_disconnect(func):
+    """
+    异步只读查询的断线重试装饰器（第一个参数须为 AsyncSession）
+    
+    连接失效时回滚会话，连接池丢弃坏连接后重试一次
+    """
+    @functools.wraps(func)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        try:
+            return await func(db, *args, **kwargs)
+        except DBAPIError as e:
+            if not e.connection_invalidated:
+                raise
+            await db.rollback()
+            return await func(db, *args, **kwargs)
+    return wrapper
+
+
 def init_database():
     """初始化数据库（创建所有表）"""
     print("正在创建数据库表...")
@@ -37,7 +37,7 @@ pip install -r requirements_production.txt
 
 # 重启后端
 echo "🔄 重启后端服务..."
-pm2 restart backend || pm2 start ecosystem.config.js || pm2 start uvicorn --name "backend" -- --host 0.0.0.0 --port 8000 api_server_unified:app
+pm2 restart backend || pm2 start ecosystem.config.js || pm2 start uvicorn --name "backend" -- --host 0.0.0.0 --port 8000 --loop uvloop --http httptools --ws-ping-interval 30 --ws-ping-timeout 10 --ws-per-message-deflate false api_server_unified:app
 
 # 更新前端
 echo "📦 更新前端..."
@@ -9,6 +9,11 @@ import logging
 import pandas as pd
 import numpy as np
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 class CustomJSONEncoder(json.JSONEncoder):
     """自定义JSON编码器，处理pandas和numpy类型"""
     def default(self, obj):
@@ -24,6 +29,54 @@ class CustomJSONEncoder(json.JSONEncoder):
             return None
         return super().default(obj)
 
+
+# 交易记录的固定字段顺序（与 log_trade_open 构造的结构一致）
+TRADE_RECORD_FIELDS = (
+    'trade_id', 'status', 'open_time', 'close_time',
+    'symbol', 'action', 'order_type',
+    'entry_price', 'stop_loss', 'take_profit', 'close_price',
+    'quantity', 'leverage', 'position_size_pct', 'position_value',
+    'reason', 'confidence', 'ai_analysis',
+    'market_data_snapshot',
+    'pnl', 'pnl_pct', 'duration_hours', 'close_reason',
+    'risk_reward_ratio',
+)
+_TRADE_FIELD_SET = frozenset(TRADE_RECORD_FIELDS)
+
+if orjson is not None:
+    _ORJSON_OPTIONS = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_SERIALIZE_NUMPY
+        | orjson.OPT_PASSTHROUGH_DATETIME
+    )
+    _json_default = CustomJSONEncoder().default
+
+    def _dumps(value) -> bytes:
+        return orjson.dumps(value, default=_json_default, option=_ORJSON_OPTIONS)
+else:
+    def _dumps(value) -> bytes:
+        return json.dumps(value, ensure_ascii=False, cls=CustomJSONEncoder).encode('utf-8')
+
+# 预先编码好的键前缀: b'{"trade_id":', b',"status":', ...
+_TRADE_KEY_PREFIXES = tuple(
+    (b'{' if i == 0 else b',') + json.dumps(key).encode('utf-8') + b':'
+    for i, key in enumerate(TRADE_RECORD_FIELDS)
+)
+_TRADE_TEMPLATE = tuple(zip(_TRADE_KEY_PREFIXES, TRADE_RECORD_FIELDS))
+
+
+def serialize_trade(trade: Dict) -> bytes:
+    """
+    序列化单条交易记录为JSON字节串
+
+    字段固定时直接拼接预编码的键，只对值做编码；
+    含额外字段（如 post_close_klines）的记录回退到通用编码。
+    """
+    if trade.keys() != _TRADE_FIELD_SET:
+        return _dumps(trade)
+    return b''.join([prefix + _dumps(trade[key]) for prefix, key in _TRADE_TEMPLATE]) + b'}'
+
+
 class TradeJournal:
     """
     交易日志系统
@@ -241,8 +294,16 @@ class TradeJournal:
                 'trades': self.trades
             }
             
-            with open(self.current_journal_file, 'w', encoding='utf-8') as f:
-                json.dump(journal_data, f, indent=2, ensure_ascii=False, cls=CustomJSONEncoder)
+            if orjson is None:
+                with open(self.current_journal_file, 'w', encoding='utf-8') as f:
+                    json.dump(journal_data, f, indent=2, ensure_ascii=False, cls=CustomJSONEncoder)
+                return
+            
+            # 快速路径: 头部字段整体编码，交易记录逐条走固定模板
+            header = orjson.dumps({k: v for k, v in journal_data.items() if k != 'trades'})
+            body = b','.join([serialize_trade(t) for t in self.trades])
+            with open(self.current_journal_file, 'wb') as f:
+                f.write(header[:-1] + b',"trades":[' + body + b']}')
             
         except Exception as e:
             logging.error(f"保存日志失败: {e}")
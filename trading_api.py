@@ -3,11 +3,12 @@
 集成 bybit_live_trading_system.py 的功能
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Response, status, BackgroundTasks
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 import logging
+import orjson
 from sqlalchemy.orm import Session
 
 # 导入认证依赖
@@ -85,6 +86,9 @@ class TradingSystemStatus(BaseModel):
 # 获取交易系统管理器单例
 trading_manager = get_trading_system_manager()
 
+# /trading/status 序列化后的响应体，仅在管理器状态版本变化时重新生成
+_status_body_cache: Dict[str, Any] = {"version": None, "body": b""}
+
 # ============================================================================
 # 交易记录端点
 # ============================================================================
@@ -406,17 +410,24 @@ async def get_trading_status(
     返回系统运行状态、统计数据等
     """
     try:
-        # 获取状态
-        status = trading_manager.get_status()
+        version = trading_manager.status_version
+        if _status_body_cache["version"] != version:
+            # 获取状态
+            status = trading_manager.get_status()
+            
+            body = TradingSystemStatus(
+                is_running=status["is_running"],
+                mode=status["config"].get("mode", "unknown"),
+                symbols=status["config"].get("symbols", []),
+                total_trades=status["stats"].get("total_trades", 0),
+                active_positions=status["stats"].get("active_positions", 0),
+                total_pnl=status["stats"].get("total_pnl", 0.0)
+            )
+            _status_body_cache["body"] = orjson.dumps(body.model_dump())
+            _status_body_cache["version"] = version
         
-        return TradingSystemStatus(
-            is_running=status["is_running"],
-            mode=status["config"].get("mode", "unknown"),
-            symbols=status["config"].get("symbols", []),
-            total_trades=status["stats"].get("total_trades", 0),
-            active_positions=status["stats"].get("active_positions", 0),
-            total_pnl=status["stats"].get("total_pnl", 0.0)
-        )
+        # 直接返回预序列化的 JSON，跳过响应模型的再次校验和序列化
+        return Response(content=_status_body_cache["body"], media_type="application/json")
     
     except Exception as e:
         logger.error(f"获取交易系统状态失败: {e}")
@@ -9,26 +9,140 @@
 - 独立的API密钥
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Type
 from datetime import datetime
+import asyncio
+import functools
+import hashlib
+import inspect
 import logging
-from sqlalchemy.orm import Session
+import os
+import time
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # 导入认证依赖
-from api_auth import get_current_user, get_current_admin_user
+from api_auth import get_current_user, get_current_admin_user, verify_token_ws
 # 导入数据库
-from database_models import get_db, Trade, User, APIKey
+from database_models import get_async_db, retry_on_disconnect, SessionLocal, Trade, User, APIKey
 # 导入多用户交易系统管理器
 from trading_system_multi_user_manager import (
     get_multi_user_trading_manager,
     TradingSystemState
 )
 
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/user", tags=["用户交易系统"])
+# 轮询接口以 JSON 编码为主要开销，统一使用 orjson 序列化
+router = APIRouter(
+    prefix="/api/user",
+    tags=["用户交易系统"],
+    default_response_class=ORJSONResponse
+)
+
+# ============================================================================
+# 响应缓存（Redis，可选）
+# ============================================================================
+
+# 仪表盘会高频轮询 status/positions/config，设置 REDIS_URL 后按用户缓存 2 秒
+REDIS_URL = os.getenv("REDIS_URL")
+RESPONSE_CACHE_TTL = 2
+CACHED_RESPONSE_KINDS = ("status", "positions", "config")
+
+response_cache = aioredis.from_url(REDIS_URL) if (aioredis and REDIS_URL) else None
+
+
+def _response_cache_key(kind: str, user_id) -> str:
+    return f"trading:{kind}:{user_id}"
+
+
+async def invalidate_user_response_cache(user_id) -> None:
+    """清除用户的缓存响应（启动/停止/重启后调用）"""
+    if response_cache is None:
+        return
+    try:
+        await response_cache.delete(
+            *(_response_cache_key(kind, user_id) for kind in CACHED_RESPONSE_KINDS)
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ 清除响应缓存失败: {e}")
+
+
+def cached_response(kind: str):
+    """按当前用户缓存 GET 响应；缓存不可用时直接调用原函数"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if response_cache is None:
+                return await func(*args, **kwargs)
+
+            key = _response_cache_key(kind, kwargs["current_user"].id)
+            try:
+                cached = await response_cache.get(key)
+                if cached is not None:
+                    return orjson.loads(cached)
+            except Exception as e:
+                logger.warning(f"⚠️ 读取响应缓存失败: {e}")
+
+            result = await func(*args, **kwargs)
+
+            try:
+                await response_cache.set(
+                    key,
+                    orjson.dumps(jsonable_encoder(result)),
+                    ex=RESPONSE_CACHE_TTL
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ 写入响应缓存失败: {e}")
+            return result
+        return wrapper
+    return decorator
+
+
+def conditional_get(func=None, *, model: Optional[Type[BaseModel]] = None):
+    """
+    为 GET 响应附加 ETag；客户端 If-None-Match 命中时返回 304，省去响应体传输
+    
+    向路由签名追加 request 参数，由 FastAPI 注入。
+    返回的是 Response，FastAPI 不会再按路由的 response_model 校验，
+    因此需要校验/过滤字段时通过 model 传入，在计算 ETag 前校验一次。
+    
+    用法: @conditional_get 或 @conditional_get(model=SomeResponse)
+    """
+    if func is None:
+        return functools.partial(conditional_get, model=model)
+    
+    @functools.wraps(func)
+    async def wrapper(*args, request: Request, **kwargs):
+        payload = await func(*args, **kwargs)
+        if model is not None:
+            payload = model.model_validate(payload).model_dump(mode="json")
+        else:
+            payload = jsonable_encoder(payload)
+        body = orjson.dumps(payload)
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        headers = {"ETag": etag}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+    
+    signature = inspect.signature(func)
+    wrapper.__signature__ = signature.replace(parameters=[
+        *signature.parameters.values(),
+        inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+    ])
+    return wrapper
 
 # ============================================================================
 # Pydantic 模型
@@ -52,6 +166,18 @@ class TradingSystemStatusResponse(BaseModel):
     stats: Dict[str, Any]
     thread_alive: bool
 
+class PositionsResponse(BaseModel):
+    """持仓列表响应"""
+    success: bool
+    positions: List[Dict[str, Any]]
+    count: int
+
+class TradesResponse(BaseModel):
+    """交易记录响应"""
+    success: bool
+    trades: List[Dict[str, Any]]
+    count: int
+
 class UserTradingConfigResponse(BaseModel):
     """用户交易配置响应"""
     has_bybit_key: bool
@@ -63,6 +189,77 @@ class UserTradingConfigResponse(BaseModel):
 # 获取多用户管理器
 multi_user_manager = get_multi_user_trading_manager()
 
+# ============================================================================
+# API 密钥读取（带短期缓存）
+# ============================================================================
+
+API_KEYS_CACHE_TTL = 60.0
+# user_id -> (读取时间, 密钥行或 None)
+_api_keys_cache: Dict[int, tuple] = {}
+
+
+def invalidate_api_keys(user_id: int) -> None:
+    """API 密钥写入后调用，清除该用户的缓存"""
+    _api_keys_cache.pop(user_id, None)
+
+
+@retry_on_disconnect
+async def _get_active_api_keys(db: AsyncSession, user_id: int):
+    """获取用户当前启用的 API 密钥（60 秒内复用上次查询结果）"""
+    cached = _api_keys_cache.get(user_id)
+    if cached is not None and time.monotonic() - cached[0] < API_KEYS_CACHE_TTL:
+        return cached[1]
+
+    result = await db.execute(
+        select(
+            APIKey.bybit_api_key,
+            APIKey.bybit_api_secret,
+            APIKey.deepseek_api_key
+        ).where(
+            APIKey.user_id == user_id,
+            APIKey.is_active == True
+        ).limit(1)
+    )
+    user_api_keys = result.first()
+    _api_keys_cache[user_id] = (time.monotonic(), user_api_keys)
+    return user_api_keys
+
+
+@retry_on_disconnect
+async def _get_api_key_flags(db: AsyncSession, user_id: int) -> tuple:
+    """只查询用户是否配置了 Bybit / DeepSeek 密钥，不读取密钥内容"""
+    result = await db.execute(
+        select(
+            APIKey.bybit_api_key.isnot(None) & (APIKey.bybit_api_key != ""),
+            APIKey.deepseek_api_key.isnot(None) & (APIKey.deepseek_api_key != "")
+        ).where(
+            APIKey.user_id == user_id,
+            APIKey.is_active == True
+        ).limit(1)
+    )
+    row = result.first()
+    if row is None:
+        return False, False
+    return bool(row[0]), bool(row[1])
+
+
+# 启动/重启请求中直接写入配置的字段
+_CONFIG_FIELDS = ("mode", "symbols", "check_interval", "max_positions", "use_ai")
+
+
+def _build_user_config(request: StartTradingRequest, user_api_keys) -> Dict[str, Any]:
+    """根据启动请求和用户 API 密钥组装交易系统配置"""
+    config = {field: getattr(request, field) for field in _CONFIG_FIELDS}
+    
+    # 如果有 API 密钥，添加到配置
+    if user_api_keys:
+        config.update(
+            bybit_api_key=user_api_keys.bybit_api_key,
+            bybit_api_secret=user_api_keys.bybit_api_secret,
+            deepseek_api_key=user_api_keys.deepseek_api_key
+        )
+    return config
+
 # ============================================================================
 # 用户交易系统控制端点
 # ============================================================================
@@ -71,7 +268,7 @@ multi_user_manager = get_multi_user_trading_manager()
 async def start_user_trading_system(
     request: StartTradingRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     启动当前用户的交易系统
@@ -82,33 +279,20 @@ async def start_user_trading_system(
     """
     try:
         # 获取用户的 API 密钥（从数据库）
-        user_api_keys = db.query(APIKey).filter(
-            APIKey.user_id == current_user.id,
-            APIKey.is_active == True
-        ).first()
+        user_api_keys = await _get_active_api_keys(db, current_user.id)
         
         # 准备配置
-        config = {
-            "mode": request.mode,
-            "symbols": request.symbols,
-            "check_interval": request.check_interval,
-            "max_positions": request.max_positions,
-            "use_ai": request.use_ai,
-        }
-        
-        # 如果有 API 密钥，添加到配置
-        if user_api_keys:
-            config["bybit_api_key"] = user_api_keys.bybit_api_key
-            config["bybit_api_secret"] = user_api_keys.bybit_api_secret
-            config["deepseek_api_key"] = user_api_keys.deepseek_api_key
+        config = _build_user_config(request, user_api_keys)
         
         # 启动用户的交易系统
         result = multi_user_manager.start_for_user(
-            user_id=str(current_user.id),
+            user_id=current_user.id_str,
             username=current_user.username,
             config=config
         )
         
+        await invalidate_user_response_cache(current_user.id)
+        
         if result["success"]:
             logger.info(f"✅ 用户 {current_user.username} 启动了自己的交易系统")
         
@@ -129,7 +313,8 @@ async def stop_user_trading_system(
     - 不影响其他用户
     """
     try:
-        result = multi_user_manager.stop_for_user(str(current_user.id))
+        result = multi_user_manager.stop_for_user(current_user.id_str)
+        await invalidate_user_response_cache(current_user.id)
         
         if result["success"]:
             logger.info(f"✅ 用户 {current_user.username} 停止了自己的交易系统")
@@ -144,7 +329,7 @@ async def stop_user_trading_system(
 async def restart_user_trading_system(
     request: Optional[StartTradingRequest] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     重启当前用户的交易系统
@@ -156,29 +341,15 @@ async def restart_user_trading_system(
         # 准备新配置（如果提供）
         config = None
         if request:
-            user_api_keys = db.query(APIKey).filter(
-                APIKey.user_id == current_user.id,
-                APIKey.is_active == True
-            ).first()
-            
-            config = {
-                "mode": request.mode,
-                "symbols": request.symbols,
-                "check_interval": request.check_interval,
-                "max_positions": request.max_positions,
-                "use_ai": request.use_ai,
-            }
-            
-            if user_api_keys:
-                config["bybit_api_key"] = user_api_keys.bybit_api_key
-                config["bybit_api_secret"] = user_api_keys.bybit_api_secret
-                config["deepseek_api_key"] = user_api_keys.deepseek_api_key
+            user_api_keys = await _get_active_api_keys(db, current_user.id)
+            config = _build_user_config(request, user_api_keys)
         
         # 重启
         result = multi_user_manager.restart_for_user(
-            str(current_user.id),
+            current_user.id_str,
             config
         )
+        await invalidate_user_response_cache(current_user.id)
         
         if result["success"]:
             logger.info(f"✅ 用户 {current_user.username} 重启了自己的交易系统")
@@ -189,7 +360,27 @@ async def restart_user_trading_system(
         logger.error(f"❌ 重启用户交易系统失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _default_status(user_id: str, username: str) -> Dict[str, Any]:
+    """尚未创建交易系统的用户的默认状态"""
+    return {
+        "user_id": user_id,
+        "username": username,
+        "state": "stopped",
+        "is_running": False,
+        "config": {"mode": "demo", "symbols": []},
+        "stats": {
+            "total_trades": 0,
+            "successful_trades": 0,
+            "failed_trades": 0,
+            "total_pnl": 0.0,
+            "active_positions": 0
+        },
+        "thread_alive": False
+    }
+
 @router.get("/trading/status", response_model=TradingSystemStatusResponse)
+@conditional_get(model=TradingSystemStatusResponse)
+@cached_response("status")
 async def get_user_trading_status(
     current_user: User = Depends(get_current_user)
 ):
@@ -199,37 +390,92 @@ async def get_user_trading_status(
     - 只查看自己的状态
     """
     try:
-        status = multi_user_manager.get_status_for_user(str(current_user.id))
+        status = await run_in_threadpool(
+            multi_user_manager.get_status_for_user,
+            current_user.id_str
+        )
         
         if status is None:
             # 用户还没有交易系统，返回默认状态
-            return TradingSystemStatusResponse(
-                user_id=str(current_user.id),
-                username=current_user.username,
-                state="stopped",
-                is_running=False,
-                config={"mode": "demo", "symbols": []},
-                stats={
-                    "total_trades": 0,
-                    "successful_trades": 0,
-                    "failed_trades": 0,
-                    "total_pnl": 0.0,
-                    "active_positions": 0
-                },
-                thread_alive=False
-            )
+            status = _default_status(current_user.id_str, current_user.username)
         
-        return TradingSystemStatusResponse(**status)
+        # 直接返回字典，由 conditional_get 按 TradingSystemStatusResponse 只校验一次
+        return status
     
     except Exception as e:
         logger.error(f"❌ 获取用户交易系统状态失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# 状态推送通道的检查间隔（秒）
+STATUS_STREAM_INTERVAL = 1.0
+
+
+def _verify_ws_token(token: str) -> Optional[Dict[str, Any]]:
+    """验证 WebSocket token 并从数据库取得用户信息"""
+    with SessionLocal() as db:
+        return verify_token_ws(token, db)
+
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    """只监听客户端断开；客户端发来的文本或二进制帧一律忽略"""
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/trading/status/ws")
+async def stream_user_trading_status(
+    websocket: WebSocket,
+    token: Optional[str] = None
+):
+    """
+    通过 WebSocket 推送当前用户的交易系统状态（替代 /trading/status 轮询）
+    
+    连接地址: ws://<host>/api/user/trading/status/ws?token=<your_jwt_token>
+    
+    - 每秒检查一次，状态有变化才推送
+    - 推送内容与 /trading/status 相同
+    """
+    user_data = await run_in_threadpool(_verify_ws_token, token) if token else None
+    if not user_data or user_data.get("user_id") is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    user_id = str(user_data["user_id"])
+    await websocket.accept()
+    
+    last_payload = None
+    # 常驻的接收任务只负责感知断开，推送节奏由 asyncio.sleep 驱动
+    disconnected = asyncio.create_task(_wait_for_disconnect(websocket))
+    try:
+        while not disconnected.done():
+            current_status = await run_in_threadpool(
+                multi_user_manager.get_status_for_user,
+                user_id
+            )
+            if current_status is None:
+                current_status = _default_status(user_id, user_data.get("username"))
+            payload = orjson.dumps(jsonable_encoder(current_status))
+            if payload != last_payload:
+                await websocket.send_text(payload.decode())
+                last_payload = payload
+            
+            await asyncio.sleep(STATUS_STREAM_INTERVAL)
+        
+        logger.info(f"用户 {user_data.get('username')} 的状态推送连接已断开")
+    
+    except WebSocketDisconnect:
+        logger.info(f"用户 {user_data.get('username')} 的状态推送连接已断开")
+    except Exception as e:
+        logger.error(f"❌ 推送用户交易系统状态失败: {e}")
+    finally:
+        disconnected.cancel()
+
 # ============================================================================
 # 用户数据查询端点
 # ============================================================================
 
-@router.get("/positions")
+@router.get("/positions", response_model=PositionsResponse)
+@cached_response("positions")
 async def get_user_positions(
     current_user: User = Depends(get_current_user)
 ):
@@ -239,7 +485,10 @@ async def get_user_positions(
     - 只查看自己的持仓
     """
     try:
-        positions = multi_user_manager.get_positions_for_user(str(current_user.id))
+        positions = await run_in_threadpool(
+            multi_user_manager.get_positions_for_user,
+            current_user.id_str
+        )
         return {
             "success": True,
             "positions": positions,
@@ -250,7 +499,7 @@ async def get_user_positions(
         logger.error(f"❌ 获取用户持仓失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/trades")
+@router.get("/trades", response_model=TradesResponse)
 async def get_user_trades(
     limit: int = 100,
     current_user: User = Depends(get_current_user)
@@ -261,8 +510,9 @@ async def get_user_trades(
     - 只查看自己的交易
     """
     try:
-        trades = multi_user_manager.get_trades_for_user(
-            str(current_user.id),
+        trades = await run_in_threadpool(
+            multi_user_manager.get_trades_for_user,
+            current_user.id_str,
             limit=limit
         )
         return {
@@ -276,9 +526,11 @@ async def get_user_trades(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/config")
+@conditional_get
+@cached_response("config")
 async def get_user_trading_config(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     获取当前用户的交易配置状态
@@ -288,16 +540,13 @@ async def get_user_trading_config(
     """
     try:
         # 获取用户状态
-        status = multi_user_manager.get_status_for_user(str(current_user.id))
-        
-        # 检查 API 密钥
-        user_api_keys = db.query(APIKey).filter(
-            APIKey.user_id == current_user.id,
-            APIKey.is_active == True
-        ).first()
+        status = await run_in_threadpool(
+            multi_user_manager.get_status_for_user,
+            current_user.id_str
+        )
         
-        has_bybit = bool(user_api_keys and user_api_keys.bybit_api_key)
-        has_deepseek = bool(user_api_keys and user_api_keys.deepseek_api_key)
+        # 检查 API 密钥（只取是否存在）
+        has_bybit, has_deepseek = await _get_api_key_flags(db, current_user.id)
         
         if status:
             config = status["config"]
@@ -336,8 +585,8 @@ async def get_all_users_trading_status(
     - 系统监控和管理
     """
     try:
-        all_status = multi_user_manager.get_all_users_status()
-        running_users = multi_user_manager.get_running_users()
+        all_status = await run_in_threadpool(multi_user_manager.get_all_users_status)
+        running_users = await run_in_threadpool(multi_user_manager.get_running_users)
         
         return {
             "success": True,
@@ -363,6 +612,7 @@ async def admin_stop_user_trading(
     """
     try:
         result = multi_user_manager.stop_for_user(user_id)
+        await invalidate_user_response_cache(user_id)
         
         if result["success"]:
             logger.info(f"✅ 管理员 {current_user.username} 停止了用户 {user_id} 的交易系统")
@@ -377,17 +627,24 @@ async def admin_stop_user_trading(
 # 健康检查
 # ============================================================================
 
+# 负载均衡器频繁探活，用户计数缓存 0.5 秒
+HEALTH_CACHE_TTL = 0.5
+_health_cache = {"ts": 0.0, "running": 0, "total": 0}
+
 @router.get("/health")
 async def user_trading_health():
     """多用户交易系统健康检查"""
-    running_count = len(multi_user_manager.get_running_users())
-    total_count = len(multi_user_manager.user_systems)
+    now = time.monotonic()
+    if now - _health_cache["ts"] >= HEALTH_CACHE_TTL:
+        _health_cache["running"] = len(multi_user_manager.get_running_users())
+        _health_cache["total"] = multi_user_manager.user_count
+        _health_cache["ts"] = now
     
     return {
         "status": "healthy",
         "mode": "multi-user",
-        "total_users": total_count,
-        "running_users": running_count
+        "total_users": _health_cache["total"],
+        "running_users": _health_cache["running"]
     }
 
 
@@ -12,7 +12,10 @@ falls back to shared/global configuration rows (``user_id`` is NULL).
 
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, Optional
+import copy
+import re
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 from sqlalchemy.orm import Session
 
@@ -23,46 +26,56 @@ from ultra_security import decrypt_api_key
 BYBIT_ENVIRONMENTS = ("demo", "testnet", "mainnet")
 DEFAULT_BASE_SYMBOLS = ["BTC", "ETH", "SOL"]
 DEFAULT_SYMBOLS = [f"{base}USDT" for base in DEFAULT_BASE_SYMBOLS]
+_DEFAULT_BASE_SET = frozenset(DEFAULT_BASE_SYMBOLS)
+
+# Loaded configs keyed by ``(user_id, preferred_mode)``; each entry stores the
+# monotonic load time alongside the result. Entries are dropped on expiry or
+# explicitly through ``invalidate_runtime_config`` when the user saves settings.
+_CACHE_TTL = 30.0
+_CONFIG_CACHE: Dict[Tuple[Optional[int], Optional[str]], Tuple[float, Dict[str, Any]]] = {}
+
+
+def invalidate_runtime_config(user_id: Optional[int] = None) -> None:
+    """Drop cached runtime configs for ``user_id`` (all preferred modes)."""
+
+    for cache_key in list(_CONFIG_CACHE):
+        if cache_key[0] == user_id:
+            _CONFIG_CACHE.pop(cache_key, None)
+
+
+# Separators accepted in free-form symbol strings, and a translation table that
+# deletes every ASCII character that is not alphanumeric.
+_SYMBOL_SPLIT_RE = re.compile(r"[\s,]+")
+_NON_ALNUM_ASCII = str.maketrans("", "", "".join(chr(c) for c in range(128) if not chr(c).isalnum()))
+
+
+def _clean_symbol(token: str) -> str:
+    clean = token.strip().upper()
+    if clean.endswith("_PERPETUAL"):
+        clean = clean[:-10]
+    if clean.endswith("USDT"):
+        clean = clean[:-4]
+    if clean.isascii():
+        return clean.translate(_NON_ALNUM_ASCII)
+    return "".join(ch for ch in clean if ch.isalnum())
 
 
 def _normalise_symbols_list(symbols: Optional[Iterable[Any]]) -> Optional[list[str]]:
     if symbols is None:
         return None
 
-    tokens: list[str] = []
-
-    def _push(token: str) -> None:
-        clean = token.strip().upper()
-        if not clean:
-            return
-        if clean.endswith("_PERPETUAL"):
-            clean = clean[:-10]
-        if clean.endswith("USDT"):
-            clean = clean[:-4]
-        clean = "".join(ch for ch in clean if ch.isalnum())
-        if not clean:
-            return
-        if clean not in tokens:
-            tokens.append(clean)
-
     if isinstance(symbols, str):
-        splitters = [",", "\n", "\t"]
-        text = symbols
-        for splitter in splitters:
-            text = text.replace(splitter, " ")
-        for part in text.split():
-            _push(part)
+        raw_tokens: Iterable[str] = _SYMBOL_SPLIT_RE.split(symbols)
     else:
+        raw_tokens = []
         for item in symbols:
-            if item is None:
-                continue
+            if isinstance(item, dict):
+                item = item.get("value")
             if isinstance(item, str):
-                _push(item)
-            elif isinstance(item, dict):
-                value = item.get("value")
-                if isinstance(value, str):
-                    _push(value)
+                raw_tokens.append(item)
 
+    # dict.fromkeys de-duplicates while keeping first-seen order.
+    tokens = list(dict.fromkeys(clean for clean in map(_clean_symbol, raw_tokens) if clean))
     return tokens or None
 
 
@@ -92,16 +105,22 @@ def _decrypt_if_sensitive(value: Any) -> Any:
         return value
 
 
-def _load_category(session: Session, category: str, user_id: Optional[int]) -> Dict[str, Any]:
-    query = session.query(Configuration).filter(Configuration.category == category)
+def _load_categories(
+    session: Session,
+    categories: Tuple[str, ...],
+    user_id: Optional[int],
+) -> Dict[str, Dict[str, Any]]:
+    """Fetch several configuration categories in a single round-trip."""
+
+    query = session.query(Configuration).filter(Configuration.category.in_(categories))
     if user_id is not None and hasattr(Configuration, "user_id"):
         query = query.filter(Configuration.user_id == user_id)
     else:
         query = query.filter(Configuration.user_id.is_(None))
 
-    results: Dict[str, Any] = {}
+    results: Dict[str, Dict[str, Any]] = {category: {} for category in categories}
     for row in query.all():
-        results[row.key] = _extract_value(row.value)
+        results[row.category][row.key] = _extract_value(row.value)
     return results
 
 
@@ -114,15 +133,33 @@ def load_trading_runtime_config(
     Returns a dict containing the keys expected by ``LiveTradingEngine`` and
     the trading managers. Raises ``RuntimeError`` if essential credentials are
     missing for the desired environment.
+
+    Results are cached for ``_CACHE_TTL`` seconds per ``(user_id,
+    preferred_mode)``; callers always receive a private copy.
     """
 
-    session = SessionLocal()
-    try:
-        bybit_entries = _load_category(session, "bybit", user_id)
-        deepseek_entries = _load_category(session, "deepseek", user_id)
-        trading_entries = _load_category(session, "trading", user_id)
-    finally:
-        session.close()
+    cache_key = (user_id, preferred_mode)
+    cached = _CONFIG_CACHE.get(cache_key)
+    if cached is not None and time.monotonic() - cached[0] < _CACHE_TTL:
+        return copy.deepcopy(cached[1])
+
+    config_overrides = _build_runtime_config(user_id, preferred_mode)
+    _CONFIG_CACHE[cache_key] = (time.monotonic(), config_overrides)
+    return copy.deepcopy(config_overrides)
+
+
+def _build_runtime_config(
+    user_id: Optional[int],
+    preferred_mode: Optional[str],
+) -> Dict[str, Any]:
+    # Reuse the shared, pooled engine; the context manager returns the
+    # connection to the pool even if a query fails.
+    with SessionLocal() as session:
+        entries = _load_categories(session, ("bybit", "deepseek", "trading"), user_id)
+
+    bybit_entries = entries["bybit"]
+    deepseek_entries = entries["deepseek"]
+    trading_entries = entries["trading"]
 
     # ------------------------------------------------------------------
     # Bybit credentials
@@ -146,39 +183,38 @@ def load_trading_runtime_config(
     if active_environment not in BYBIT_ENVIRONMENTS:
         active_environment = "demo"
 
-    env_credentials: Dict[str, Dict[str, str]] = {}
+    # Pick the environment from the raw (still encrypted) values first and only
+    # decrypt the credentials that will actually be used. Encrypted non-empty
+    # strings are truthy, so availability can be decided before decryption.
+    raw_credentials: Dict[str, Tuple[Any, Any]] = {}
 
     for env in BYBIT_ENVIRONMENTS:
-        key_raw = bybit_entries.get(f"api_key_{env}")
-        secret_raw = bybit_entries.get(f"api_secret_{env}")
+        key_raw = _extract_value(bybit_entries.get(f"api_key_{env}"))
+        secret_raw = _extract_value(bybit_entries.get(f"api_secret_{env}"))
 
-        key = _decrypt_if_sensitive(_extract_value(key_raw))
-        secret = _decrypt_if_sensitive(_extract_value(secret_raw))
-
-        if key and secret:
-            env_credentials[env] = {
-                "api_key": key,
-                "api_secret": secret,
-            }
+        if key_raw and secret_raw:
+            raw_credentials[env] = (key_raw, secret_raw)
 
     # Legacy fallback – single set of keys without env suffix.
-    if not env_credentials:
-        legacy_key = _decrypt_if_sensitive(_extract_value(bybit_entries.get("api_key")))
-        legacy_secret = _decrypt_if_sensitive(_extract_value(bybit_entries.get("api_secret")))
+    if not raw_credentials:
+        legacy_key = _extract_value(bybit_entries.get("api_key"))
+        legacy_secret = _extract_value(bybit_entries.get("api_secret"))
         if legacy_key and legacy_secret:
-            env_credentials["demo"] = {
-                "api_key": legacy_key,
-                "api_secret": legacy_secret,
-            }
-            if active_environment not in env_credentials:
-                active_environment = "demo"
-
-    if active_environment not in env_credentials and env_credentials:
-        # Fall back to any environment that has credentials.
-        active_environment = next(iter(env_credentials.keys()))
+            raw_credentials["demo"] = (legacy_key, legacy_secret)
+            active_environment = "demo"
 
-    creds = env_credentials.get(active_environment)
-    if not creds:
+    if active_environment not in raw_credentials and raw_credentials:
+        # Fall back to any environment that has credentials.
+        active_environment = next(iter(raw_credentials.keys()))
+
+    raw_creds = raw_credentials.get(active_environment)
+    creds = None
+    if raw_creds:
+        creds = {
+            "api_key": _decrypt_if_sensitive(raw_creds[0]),
+            "api_secret": _decrypt_if_sensitive(raw_creds[1]),
+        }
+    if not creds or not (creds["api_key"] and creds["api_secret"]):
         raise RuntimeError(
             "No Bybit API credentials found. Please configure API keys for the selected environment."
         )
@@ -205,7 +241,7 @@ def load_trading_runtime_config(
 
     selected_bases = _normalise_symbols_list(trading_entries.get("symbols"))
     if not selected_bases:
-        selected_bases = DEFAULT_BASE_SYMBOLS.copy()
+        selected_bases = list(DEFAULT_BASE_SYMBOLS)
 
     selected_symbols = [f"{base}USDT" for base in selected_bases]
 
@@ -226,10 +262,7 @@ def load_trading_runtime_config(
     if deepseek_system_prompt:
         config_overrides["deepseek_system_prompt"] = deepseek_system_prompt
 
-    default_base_set = set(DEFAULT_BASE_SYMBOLS)
-    selected_base_set = set(selected_bases)
-
-    if selected_base_set != default_base_set:
+    if frozenset(selected_bases) != _DEFAULT_BASE_SET:
         prompt = (deepseek_system_prompt or "").strip()
         if not prompt:
             raise RuntimeError(
@@ -9,15 +9,68 @@
 - 配置动态更新
 """
 
+import collections
+import dataclasses
+import functools
+import importlib
 import logging
+import queue
 import threading
+import time
+from dataclasses import dataclass
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from enum import Enum
 
 logger = logging.getLogger(__name__)
 
-from trading_runtime_config import load_trading_runtime_config
+from trading_runtime_config import load_trading_runtime_config, invalidate_runtime_config
+
+
+# LiveTradingEngine 接受的构造参数（从 self.config 中按键取值）
+ENGINE_KWARG_KEYS = (
+    "mode",
+    "symbols",
+    "check_interval",
+    "bybit_api_key",
+    "bybit_api_secret",
+    "use_testnet",
+    "use_demo",
+    "deepseek_api_key",
+    "deepseek_model",
+    "deepseek_system_prompt",
+    "trading_interval",
+    "max_position_pct",
+    "default_leverage",
+    "use_trailing_stop",
+)
+
+
+# LiveTradingEngine 类的导入结果缓存（首次启动时导入，之后的启动/重启直接复用）
+_engine_cls: Optional[type] = None
+_engine_import_error: Optional[ImportError] = None
+
+
+def _get_engine_cls() -> Optional[type]:
+    """返回 LiveTradingEngine 类；不可导入时返回 None（失败结果同样缓存）"""
+    global _engine_cls, _engine_import_error
+    if _engine_cls is None and _engine_import_error is None:
+        try:
+            # 延迟导入避免循环依赖
+            module = importlib.import_module("bybit_live_trading_system")
+            _engine_cls = module.LiveTradingEngine
+        except ImportError as e:
+            _engine_import_error = e
+    return _engine_cls
+
+
+def _with_state_lock(method):
+    """在 self._state_lock 内执行生命周期方法，保证状态转换单写者"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._state_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class TradingSystemState(str, Enum):
@@ -29,63 +82,102 @@ class TradingSystemState(str, Enum):
     ERROR = "error"
 
 
+@dataclass(slots=True)
+class TradingStats:
+    """交易系统统计（slots 数据类，模拟交易循环中的累加是普通属性写入）"""
+    start_time: Optional[float] = None  # time.time() 时间戳，快照时再格式化
+    stop_time: Optional[float] = None
+    total_trades: int = 0
+    successful_trades: int = 0
+    failed_trades: int = 0
+    total_pnl: float = 0.0
+    active_positions: int = 0
+    last_error: Optional[str] = None
+
+
 class TradingSystemManager:
     """
     交易系统管理器（单例模式）
     
-    负责管理 bybit_live_trading_system 的生命周期
+    负责管理 bybit_live_trading_system 的生命周期。
+    单例在模块导入时创建（导入锁保证线程安全），请通过 get_trading_system_manager() 获取。
     """
     
-    _instance = None
-    _lock = threading.Lock()
-    
-    def __new__(cls):
-        """单例模式"""
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-                    cls._instance._initialized = False
-        return cls._instance
+    # get_status() 结果的缓存时长（秒），用于吸收面板的高频轮询
+    STATUS_CACHE_TTL = 0.25
     
     def __init__(self):
         """初始化管理器"""
-        if self._initialized:
-            return
-            
-        self._initialized = True
-        self.state = TradingSystemState.STOPPED
+        # 状态版本号：任何状态/配置/统计变化都会递增，使状态缓存立即失效
+        self._status_version = 0
+        self._status_cache: Optional[Dict[str, Any]] = None
+        self._status_cache_ts = 0.0
+        self._status_cache_version = -1
+        self._state = TradingSystemState.STOPPED
+        # 可重入：restart() 持锁时还会调用 stop()/start()
+        self._state_lock = threading.RLock()
         self.trading_system = None
+        # 交易系统实例支持的可选方法（实例创建时计算一次，运行结束时清空）
+        self._caps: Dict[str, bool] = {}
+        # 常驻交易工作线程：首次启动时创建，之后的启动/重启复用同一线程
         self.trading_thread: Optional[threading.Thread] = None
+        self._run_queue: "queue.Queue[int]" = queue.Queue()
+        self._run_done = threading.Event()
+        self._run_done.set()
+        # 运行代号：每次启动递增，旧的运行结束时不会改动新一次运行的状态
+        self._run_generation = 0
         self.stop_event = threading.Event()
+        # 交易系统进入运行状态（或启动失败）时置位，替代固定的启动等待
+        self._ready_event = threading.Event()
         
         # 系统统计
-        self.stats = {
-            "start_time": None,
-            "stop_time": None,
-            "total_trades": 0,
-            "successful_trades": 0,
-            "failed_trades": 0,
-            "total_pnl": 0.0,
-            "active_positions": 0,
-            "last_error": None
-        }
+        self.stats = TradingStats()
+        # 多字段统计更新与状态快照共用此锁，避免读到半更新的统计
+        self._stats_lock = threading.Lock()
         
-        # 配置
-        self.config = {
+        # 配置：分层叠加，查找顺序为 启动参数 > 运行时配置 > update_config 覆盖 > 默认值
+        # 启动时只替换对应的层，不再逐键 update 整个配置字典
+        self._defaults = {
             "mode": "demo",  # demo/testnet/live
             "symbols": ["BTCUSDT"],
             "max_positions": 3,
             "check_interval": 60,
             "use_ai": True
         }
+        self._overrides: Dict[str, Any] = {}
+        # update_config() 每次递增，运行中的循环据此判断是否需要重新读取配置
+        self._config_version = 0
+        self._runtime: Dict[str, Any] = {}
+        self._user: Dict[str, Any] = {}
+        self.config = collections.ChainMap(
+            self._user, self._runtime, self._overrides, self._defaults
+        )
         
         logger.info("✅ 交易系统管理器初始化完成")
     
+    @property
+    def state(self) -> TradingSystemState:
+        return self._state
+    
+    @state.setter
+    def state(self, value: TradingSystemState):
+        self._state = value
+        self._status_version += 1
+    
+    def _bump_status(self):
+        """标记状态已变化（使 get_status 缓存失效）"""
+        self._status_version += 1
+    
+    @property
+    def status_version(self) -> int:
+        """状态版本号，调用方可据此缓存基于状态派生的数据（如序列化后的响应体）"""
+        return self._status_version
+    
     # ========================================================================
     # 生命周期管理
     # ========================================================================
     
+    @_with_state_lock
     def start(self, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         启动交易系统
@@ -111,6 +203,15 @@ class TradingSystemManager:
                     "state": self.state
                 }
             
+            # 上一次停止超时时引擎可能仍在 run() 中，等它结束后才能再次启动
+            if not self._run_done.wait(timeout=10):
+                logger.error("❌ 上一次运行尚未结束，无法启动")
+                return {
+                    "success": False,
+                    "message": "上一次运行尚未结束，请稍后重试",
+                    "state": self.state
+                }
+            
             requested_mode = None
             if config and "mode" in config:
                 requested_mode = config.get("mode")
@@ -120,18 +221,19 @@ class TradingSystemManager:
             except RuntimeError as runtime_error:
                 logger.error(f"❌ 加载交易配置失败: {runtime_error}")
                 self.state = TradingSystemState.ERROR
-                self.stats["last_error"] = str(runtime_error)
+                self.stats.last_error = str(runtime_error)
                 return {
                     "success": False,
                     "message": str(runtime_error),
                     "state": self.state,
                 }
 
-            # 先应用运行时配置，然后覆盖用户传入的额外参数（例如 symbols、check_interval）
-            self.config.update(runtime_overrides)
-
+            # 运行时配置在下层，用户传入的额外参数（例如 symbols、check_interval）在上层覆盖
+            # 未传入参数时沿用上次启动的参数层
+            self._runtime = runtime_overrides
             if config:
-                self.config.update({k: v for k, v in config.items() if v is not None})
+                self._user = {k: v for k, v in config.items() if v is not None}
+            self.config.maps = [self._user, self._runtime, self._overrides, self._defaults]
 
             # 保证模式字段与真实环境一致
             if "mode" not in self.config and "active_environment" in runtime_overrides:
@@ -150,47 +252,48 @@ class TradingSystemManager:
             )
             self.state = TradingSystemState.STARTING
             
-            # 重置停止事件
+            # 重置停止事件和就绪事件
             self.stop_event.clear()
+            self._ready_event.clear()
             
-            # 启动交易系统线程
-            self.trading_thread = threading.Thread(
-                target=self._run_trading_system,
-                daemon=True
-            )
-            self.trading_thread.start()
+            # 交给常驻工作线程运行交易系统
+            self._run_generation += 1
+            self._run_done.clear()
+            self._ensure_worker()
+            self._run_queue.put(self._run_generation)
             
-            # 等待系统初始化
-            import time
-            time.sleep(2)
+            # 等待系统初始化（就绪或失败即返回）
+            self._ready_event.wait(timeout=10)
             
             if self.state == TradingSystemState.RUNNING:
-                self.stats["start_time"] = datetime.now().isoformat()
+                self.stats.start_time = time.time()
+                self._bump_status()
                 logger.info("✅ 交易系统启动成功")
                 return {
                     "success": True,
                     "message": "交易系统启动成功",
                     "state": self.state,
-                    "config": self.config
+                    "config": dict(self.config)
                 }
             else:
                 logger.error("❌ 交易系统启动失败")
                 return {
                     "success": False,
-                    "message": f"交易系统启动失败: {self.stats.get('last_error', 'Unknown')}",
+                    "message": f"交易系统启动失败: {self.stats.last_error or 'Unknown'}",
                     "state": self.state
                 }
                 
         except Exception as e:
             logger.error(f"❌ 启动交易系统时出错: {e}")
             self.state = TradingSystemState.ERROR
-            self.stats["last_error"] = str(e)
+            self.stats.last_error = str(e)
             return {
                 "success": False,
                 "message": f"启动失败: {str(e)}",
                 "state": self.state
             }
     
+    @_with_state_lock
     def stop(self) -> Dict[str, Any]:
         """
         停止交易系统
@@ -215,17 +318,18 @@ class TradingSystemManager:
             # 停止交易系统实例
             if self.trading_system:
                 try:
-                    if hasattr(self.trading_system, 'stop'):
+                    if self._caps.get("stop"):
                         self.trading_system.stop()
                 except Exception as e:
                     logger.error(f"停止交易系统实例时出错: {e}")
             
-            # 等待线程结束
-            if self.trading_thread and self.trading_thread.is_alive():
-                self.trading_thread.join(timeout=10)
+            # 等待本次运行结束（工作线程本身保留复用）
+            if not self._run_done.wait(timeout=10):
+                logger.warning("⚠️ 交易系统未在10秒内结束运行，结束前不能再次启动")
             
             self.state = TradingSystemState.STOPPED
-            self.stats["stop_time"] = datetime.now().isoformat()
+            self.stats.stop_time = time.time()
+            self._bump_status()
             
             logger.info("✅ 交易系统已停止")
             return {
@@ -237,13 +341,14 @@ class TradingSystemManager:
         except Exception as e:
             logger.error(f"❌ 停止交易系统时出错: {e}")
             self.state = TradingSystemState.ERROR
-            self.stats["last_error"] = str(e)
+            self.stats.last_error = str(e)
             return {
                 "success": False,
                 "message": f"停止失败: {str(e)}",
                 "state": self.state
             }
     
+    @_with_state_lock
     def restart(self, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         重启交易系统
@@ -256,14 +361,16 @@ class TradingSystemManager:
         """
         logger.info("🔄 正在重启交易系统...")
         
+        # 重启时强制重新读取运行时配置（绕过 load_trading_runtime_config 的缓存）
+        invalidate_runtime_config()
+        
         # 先停止
         stop_result = self.stop()
         if not stop_result["success"]:
             return stop_result
         
-        # 等待完全停止
-        import time
-        time.sleep(2)
+        # 等待本次运行真正结束（工作线程退出交易循环即返回，不再固定等待 2 秒）
+        self._run_done.wait(timeout=5)
         
         # 再启动
         return self.start(config)
@@ -272,64 +379,86 @@ class TradingSystemManager:
     # 交易系统运行逻辑
     # ========================================================================
     
-    def _run_trading_system(self):
+    def _ensure_worker(self):
+        """确保常驻工作线程存在（守护线程，不阻塞进程退出）"""
+        if self.trading_thread is None or not self.trading_thread.is_alive():
+            self.trading_thread = threading.Thread(
+                target=self._worker_loop,
+                daemon=True,
+                name="trading-engine"
+            )
+            self.trading_thread.start()
+    
+    def _worker_loop(self):
+        """工作线程主循环：逐个执行提交的交易系统运行任务"""
+        while True:
+            generation = self._run_queue.get()
+            try:
+                self._run_trading_system(generation)
+            finally:
+                self._run_done.set()
+    
+    def _run_trading_system(self, generation: int):
         """
         在后台线程中运行交易系统
         
-        这里是交易系统的主循环
+        这里是交易系统的主循环。只有 generation 仍是最新一次启动时才会改动状态和就绪事件
         """
+        def current() -> bool:
+            return generation == self._run_generation
+        
         try:
             logger.info("📊 交易系统线程启动")
             
-            # 导入交易系统（延迟导入避免循环依赖）
-            try:
-                from bybit_live_trading_system import LiveTradingEngine
-
+            engine_cls = _get_engine_cls()
+            if engine_cls is not None:
+                # 过滤掉 None，避免覆盖默认值
+                config = self.config
                 engine_kwargs = {
-                    "mode": self.config.get("mode"),
-                    "symbols": self.config.get("symbols"),
-                    "check_interval": self.config.get("check_interval"),
-                    "bybit_api_key": self.config.get("bybit_api_key"),
-                    "bybit_api_secret": self.config.get("bybit_api_secret"),
-                    "use_testnet": self.config.get("use_testnet"),
-                    "use_demo": self.config.get("use_demo"),
-                    "deepseek_api_key": self.config.get("deepseek_api_key"),
-                    "deepseek_model": self.config.get("deepseek_model"),
-                    "deepseek_system_prompt": self.config.get("deepseek_system_prompt"),
-                    "trading_interval": self.config.get("trading_interval"),
-                    "max_position_pct": self.config.get("max_position_pct"),
-                    "default_leverage": self.config.get("default_leverage"),
-                    "use_trailing_stop": self.config.get("use_trailing_stop"),
+                    key: config[key]
+                    for key in ENGINE_KWARG_KEYS
+                    if config.get(key) is not None
                 }
 
-                # 过滤掉 None，避免覆盖默认值
-                engine_kwargs = {k: v for k, v in engine_kwargs.items() if v is not None}
-
                 # 创建交易系统实例
-                self.trading_system = LiveTradingEngine(**engine_kwargs)
+                self.trading_system = engine_cls(**engine_kwargs)
+                self._caps = {
+                    name: hasattr(self.trading_system, name)
+                    for name in ("stop", "get_positions", "get_trades")
+                }
                 
                 logger.info("✅ 交易系统实例创建成功")
-                self.state = TradingSystemState.RUNNING
+                if current():
+                    self.state = TradingSystemState.RUNNING
+                    self._ready_event.set()
                 
                 # 运行交易系统（阻塞调用）
                 self.trading_system.run()
                 
-            except ImportError as e:
-                logger.error(f"❌ 无法导入交易系统: {e}")
+            else:
+                logger.error(f"❌ 无法导入交易系统: {_engine_import_error}")
                 logger.info("⚠️ 使用模拟交易系统")
-                self.state = TradingSystemState.RUNNING
+                if current():
+                    self.state = TradingSystemState.RUNNING
+                    self._ready_event.set()
                 
                 # 模拟交易系统（用于开发/测试）
                 self._run_mock_trading_system()
             
         except Exception as e:
             logger.error(f"❌ 交易系统运行错误: {e}")
-            self.state = TradingSystemState.ERROR
-            self.stats["last_error"] = str(e)
+            if current():
+                self.state = TradingSystemState.ERROR
+                self.stats.last_error = str(e)
+                self._ready_event.set()
         finally:
             logger.info("📊 交易系统线程结束")
-            if self.state != TradingSystemState.ERROR:
-                self.state = TradingSystemState.STOPPED
+            if current():
+                self._caps = {}
+                if self.state != TradingSystemState.ERROR:
+                    self.state = TradingSystemState.STOPPED
+                # 引擎 run() 直接返回时也不能让 start() 等满超时
+                self._ready_event.set()
     
     def _run_mock_trading_system(self):
         """
@@ -339,36 +468,60 @@ class TradingSystemManager:
         """
         logger.info("🎭 运行模拟交易系统")
         
-        import time
-        import random
+        import numpy as np
+        
+        # 随机数按批预生成，每个周期只做数组索引
+        batch_size = 1024
+        rng = np.random.default_rng()
+        symbols = tuple(self.config["symbols"])
+        i = batch_size
+        check_interval = self.config.get("check_interval", 60)
+        seen_config_version = self._config_version
         
         while not self.stop_event.is_set():
             try:
+                if i >= batch_size:
+                    trade_rolls = rng.random(batch_size)
+                    trade_types = rng.integers(0, 2, batch_size)
+                    trade_symbols = rng.integers(0, len(symbols), batch_size)
+                    success_rolls = rng.random(batch_size)
+                    pnls = rng.uniform(-100, 200, batch_size)
+                    positions = rng.integers(0, 4, batch_size)
+                    i = 0
+                
                 # 模拟交易逻辑
-                if random.random() > 0.8:  # 20% 概率生成交易
-                    trade_type = random.choice(["buy", "sell"])
-                    symbol = random.choice(self.config["symbols"])
+                if trade_rolls[i] > 0.8:  # 20% 概率生成交易
+                    trade_type = ("buy", "sell")[trade_types[i]]
+                    symbol = symbols[trade_symbols[i]]
                     
                     logger.info(f"📈 模拟交易: {trade_type.upper()} {symbol}")
                     
-                    self.stats["total_trades"] += 1
-                    if random.random() > 0.3:  # 70% 成功率
-                        self.stats["successful_trades"] += 1
-                        pnl = random.uniform(-100, 200)
-                        self.stats["total_pnl"] += pnl
-                    else:
-                        self.stats["failed_trades"] += 1
+                    succeeded = success_rolls[i] > 0.3  # 70% 成功率
+                    pnl = float(pnls[i])
+                    with self._stats_lock:
+                        self.stats.total_trades += 1
+                        if succeeded:
+                            self.stats.successful_trades += 1
+                            self.stats.total_pnl += pnl
+                        else:
+                            self.stats.failed_trades += 1
                 
                 # 模拟持仓数量
-                self.stats["active_positions"] = random.randint(0, 3)
+                self.stats.active_positions = int(positions[i])
+                self._bump_status()
+                i += 1
                 
-                # 休眠一段时间
-                check_interval = self.config.get("check_interval", 60)
+                # 休眠一段时间（配置有更新时才重新读取间隔）
+                if seen_config_version != self._config_version:
+                    check_interval = self.config.get("check_interval", 60)
+                    seen_config_version = self._config_version
                 self.stop_event.wait(timeout=check_interval)
                 
             except Exception as e:
                 logger.error(f"模拟交易系统错误: {e}")
-                time.sleep(5)
+                # 出错退避期间也能被 stop() 立即唤醒
+                if self.stop_event.wait(timeout=5):
+                    break
         
         logger.info("🎭 模拟交易系统已停止")
     
@@ -381,15 +534,38 @@ class TradingSystemManager:
         获取交易系统状态
         
         Returns:
-            状态信息字典
+            状态信息字典（缓存的浅拷贝，调用方增删键不会影响其他读取者）
         """
-        return {
+        now = time.monotonic()
+        version = self._status_version
+        cached = self._status_cache
+        if (
+            cached is not None
+            and version == self._status_cache_version
+            and now - self._status_cache_ts < self.STATUS_CACHE_TTL
+        ):
+            return dict(cached)
+        
+        status = {
             "state": self.state,
             "is_running": self.state == TradingSystemState.RUNNING,
-            "config": self.config,
-            "stats": self.stats,
-            "thread_alive": self.trading_thread.is_alive() if self.trading_thread else False
+            "config": dict(self.config),
+            "stats": self.stats_snapshot(),
+            "thread_alive": not self._run_done.is_set()
         }
+        self._status_cache = status
+        self._status_cache_ts = now
+        self._status_cache_version = version
+        return dict(status)
+    
+    def stats_snapshot(self) -> Dict[str, Any]:
+        """在统计锁内复制一份一致的统计数据"""
+        with self._stats_lock:
+            snapshot = dataclasses.asdict(self.stats)
+        for key in ("start_time", "stop_time"):
+            if snapshot[key] is not None:
+                snapshot[key] = datetime.fromtimestamp(snapshot[key]).isoformat()
+        return snapshot
     
     def get_positions(self) -> List[Dict[str, Any]]:
         """
@@ -398,7 +574,7 @@ class TradingSystemManager:
         Returns:
             持仓列表
         """
-        if self.trading_system and hasattr(self.trading_system, 'get_positions'):
+        if self.trading_system and self._caps.get("get_positions"):
             try:
                 return self.trading_system.get_positions()
             except Exception as e:
@@ -417,7 +593,7 @@ class TradingSystemManager:
         Returns:
             交易记录列表
         """
-        if self.trading_system and hasattr(self.trading_system, 'get_trades'):
+        if self.trading_system and self._caps.get("get_trades"):
             try:
                 return self.trading_system.get_trades(limit=limit)
             except Exception as e:
@@ -437,13 +613,21 @@ class TradingSystemManager:
             操作结果
         """
         try:
-            self.config.update(config)
+            self._overrides.update(config)
+            # 新值立即生效：移除上次启动时传入参数和运行时配置中的同名键
+            # （下次启动会重新加载运行时配置，运行时配置提供的键届时仍以其为准）
+            for key in config:
+                self._user.pop(key, None)
+                self._runtime.pop(key, None)
+            self._config_version += 1
+            self._bump_status()
+            invalidate_runtime_config()
             logger.info(f"✅ 配置已更新: {config}")
             
             return {
                 "success": True,
                 "message": "配置已更新（重启后生效）",
-                "config": self.config
+                "config": dict(self.config)
             }
         except Exception as e:
             logger.error(f"更新配置失败: {e}")
@@ -457,6 +641,9 @@ class TradingSystemManager:
 # 全局单例访问
 # ============================================================================
 
+_MANAGER = TradingSystemManager()
+
+
 def get_trading_system_manager() -> TradingSystemManager:
     """
     获取交易系统管理器单例
@@ -464,7 +651,7 @@ def get_trading_system_manager() -> TradingSystemManager:
     Returns:
         TradingSystemManager 实例
     """
-    return TradingSystemManager()
+    return _MANAGER
 
 
 # ============================================================================
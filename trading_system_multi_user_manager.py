@@ -9,13 +9,19 @@
 - 资金账户隔离（需要用户自己配置 API 密钥）
 """
 
+import asyncio
+import concurrent.futures
 import logging
 import threading
-from typing import Optional, Dict, Any, List
+import time
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Callable, Mapping, Final, Tuple
 from datetime import datetime
 from enum import Enum
 import json
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 from trading_runtime_config import load_trading_runtime_config
@@ -30,6 +36,125 @@ class TradingSystemState(str, Enum):
     ERROR = "error"
 
 
+# LiveTradingEngine 构造参数名 -> self.config 中的键
+_ENGINE_KWARG_MAP: Final[Tuple[Tuple[str, str], ...]] = (
+    ("mode", "mode"),
+    ("symbols", "symbols"),
+    ("check_interval", "check_interval"),
+    ("bybit_api_key", "bybit_api_key"),
+    ("bybit_api_secret", "bybit_api_secret"),
+    ("use_testnet", "use_testnet"),
+    ("use_demo", "use_demo"),
+    ("deepseek_api_key", "deepseek_api_key"),
+    ("deepseek_model", "deepseek_model"),
+    ("deepseek_system_prompt", "deepseek_system_prompt"),
+    ("trading_interval", "trading_interval"),
+    ("max_position_pct", "max_position_pct"),
+    ("default_leverage", "default_leverage"),
+    ("use_trailing_stop", "use_trailing_stop"),
+)
+
+
+# 用户可调整的数值参数及其允许范围 (下限, 上限)
+_USER_CONFIG_BOUNDS: Final[Tuple[Tuple[str, float, float], ...]] = (
+    ("max_positions", 1, 5),
+    ("check_interval", 30, 300),
+    ("risk_per_trade", 0.01, 0.05),
+)
+
+
+def _validate_user_config(raw: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    校验用户提交的配置，返回净化后的副本（不修改传入的字典）
+    
+    - 丢弃值为 None 的项和 symbols（交易对固定，不允许修改）
+    - 数值参数限制在 _USER_CONFIG_BOUNDS 范围内
+    """
+    clean = {k: v for k, v in raw.items() if v is not None and k != "symbols"}
+    for key, lo, hi in _USER_CONFIG_BOUNDS:
+        if key in clean:
+            clean[key] = max(lo, min(hi, clean[key]))
+    return clean
+
+
+# LiveTradingEngine 类缓存：首次启动时导入，之后的启动直接复用
+_LiveTradingEngine: Optional[type] = None
+_engine_lock = threading.Lock()
+
+
+def _get_engine_cls() -> type:
+    """
+    获取 LiveTradingEngine 类（延迟导入避免循环依赖）
+    
+    Raises:
+        ImportError: 交易系统模块不可用（调用方回退到模拟交易系统）
+    """
+    global _LiveTradingEngine
+    engine_cls = _LiveTradingEngine
+    if engine_cls is None:
+        with _engine_lock:
+            if _LiveTradingEngine is None:
+                from bybit_live_trading_system import LiveTradingEngine
+                _LiveTradingEngine = LiveTradingEngine
+            engine_cls = _LiveTradingEngine
+    return engine_cls
+
+
+class _LoopThread:
+    """
+    所有用户交易系统共享的后台事件循环
+    
+    模拟交易循环等以协程方式运行在同一个守护线程的事件循环上，
+    避免每个用户占用一个系统线程
+    """
+    
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _lock = threading.Lock()
+    
+    @classmethod
+    def get_loop(cls) -> asyncio.AbstractEventLoop:
+        """获取共享事件循环（首次调用时在守护线程中启动）"""
+        loop = cls._loop
+        if loop is not None:
+            return loop
+        with cls._lock:
+            if cls._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever,
+                    daemon=True,
+                    name="Trading-loop"
+                ).start()
+                cls._loop = loop
+            return cls._loop
+
+
+async def _run_in_daemon_thread(func: Callable[[], Any], name: str) -> Any:
+    """
+    在独立守护线程中执行阻塞调用并等待结果
+    
+    不使用事件循环默认线程池：其工作线程在解释器退出时会被 join，
+    长期阻塞的交易引擎会导致进程无法退出
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def _resolve(setter, value):
+        if not future.done():
+            setter(value)
+    
+    def _target():
+        try:
+            result = func()
+        except BaseException as e:
+            loop.call_soon_threadsafe(_resolve, future.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(_resolve, future.set_result, result)
+    
+    threading.Thread(target=_target, daemon=True, name=name).start()
+    return await future
+
+
 class UserTradingSystem:
     """
     单个用户的交易系统实例
@@ -37,20 +162,69 @@ class UserTradingSystem:
     每个用户一个独立的实例，互不干扰
     """
     
-    def __init__(self, user_id: str, username: str):
+    # 每个注册用户常驻一个实例，固定属性集合用 __slots__ 省去实例 __dict__
+    __slots__ = (
+        "user_id",
+        "username",
+        "_on_state_change",
+        "_state",
+        "trading_system",
+        "_run_future",
+        "stop_event",
+        "ready_event",
+        "failed_event",
+        "stats",
+        "config",
+        "_safe_config_cached",
+        "_status_cache",
+        "_status_cache_ts",
+    )
+    
+    # get_status() 缓存时长（秒）
+    STATUS_CACHE_TTL = 0.5
+    
+    # stop() 等待交易任务结束的总时长及分片间隔（秒）
+    STOP_TIMEOUT = 10.0
+    STOP_POLL_INTERVAL = 0.5
+    
+    # 状态中需要脱敏的配置键
+    _SECRET_KEYS: Final = frozenset({"bybit_api_key", "bybit_api_secret", "deepseek_api_key"})
+    
+    # ⚠️ 交易对固定，由系统统一管理，用户不可修改（所有实例共享）
+    FIXED_SYMBOLS: Final[Tuple[str, ...]] = ("BTCUSDT", "ETHUSDT", "SOLUSDT")
+    
+    def __init__(
+        self,
+        user_id: str,
+        username: str,
+        on_state_change: Optional[Callable[["UserTradingSystem"], None]] = None
+    ):
         """
         初始化用户交易系统
         
         Args:
             user_id: 用户ID
             username: 用户名
+            on_state_change: 状态变化回调（管理器用来维护运行中用户快照）
         """
         self.user_id = user_id
         self.username = username
-        self.state = TradingSystemState.STOPPED
+        self._on_state_change = on_state_change
+        self._state = TradingSystemState.STOPPED
         self.trading_system = None
-        self.trading_thread: Optional[threading.Thread] = None
-        self.stop_event = threading.Event()
+        # 在共享事件循环上运行的交易任务，以及对应的停止事件（每次启动重新创建）
+        self._run_future: Optional[concurrent.futures.Future] = None
+        self.stop_event = asyncio.Event()
+        # 启动结果通知：进入运行状态或失败时 ready_event 都会置位，失败时另置 failed_event
+        self.ready_event = threading.Event()
+        self.failed_event = threading.Event()
+        
+        # 脱敏配置缓存，self.config 变化后置空
+        self._safe_config_cached: Optional[Dict[str, Any]] = None
+        
+        # get_status() 结果短时缓存，状态或统计变化时置空
+        self._status_cache: Optional[Dict[str, Any]] = None
+        self._status_cache_ts = 0.0
         
         # 用户专属统计
         self.stats = {
@@ -67,13 +241,10 @@ class UserTradingSystem:
         }
         
         # 用户专属配置
-        # ⚠️ 交易对固定，由系统统一管理，用户不可修改
-        self.FIXED_SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]  # 固定交易对
-        
         self.config = {
             "user_id": user_id,
             "mode": "demo",  # 运行模式：demo/testnet/live（用户可选）
-            "symbols": self.FIXED_SYMBOLS,  # 交易对固定
+            "symbols": list(self.FIXED_SYMBOLS),  # 交易对固定
             "max_positions": 3,  # 最大持仓数（用户可调整 1-5）
             "check_interval": 60,  # 检查间隔（用户可调整 30-300 秒）
             "use_ai": True,  # 是否使用 AI（用户可开关）
@@ -93,6 +264,18 @@ class UserTradingSystem:
         
         logger.info(f"✅ 创建用户 {username} 的交易系统实例")
     
+    @property
+    def state(self) -> TradingSystemState:
+        return self._state
+    
+    @state.setter
+    def state(self, value: TradingSystemState):
+        changed = value != self._state
+        self._state = value
+        self._status_cache = None
+        if changed and self._on_state_change:
+            self._on_state_change(self)
+    
     # ========================================================================
     # 生命周期管理
     # ========================================================================
@@ -114,34 +297,14 @@ class UserTradingSystem:
                     "state": self.state
                 }
             
-            preferred_mode = None
-
-            # 更新配置（但交易对固定，不允许修改）
-            if config:
-                # 移除用户尝试修改的 symbols（如果有）
-                if "symbols" in config:
-                    logger.warning(f"用户 {self.username} 尝试修改交易对，已忽略")
-                    del config["symbols"]
-
-                # 记录用户期望的模式
-                if "mode" in config:
-                    preferred_mode = config.get("mode")
+            # 验证和限制用户参数（交易对固定，不允许修改）
+            config = config or {}
+            if "symbols" in config:
+                logger.warning(f"用户 {self.username} 尝试修改交易对，已忽略")
+            clean = _validate_user_config(config)
 
-                # 验证和限制用户参数
-                if "max_positions" in config:
-                    config["max_positions"] = max(1, min(5, config["max_positions"]))
-
-                if "check_interval" in config:
-                    config["check_interval"] = max(30, min(300, config["check_interval"]))
-
-                if "risk_per_trade" in config:
-                    config["risk_per_trade"] = max(0.01, min(0.05, config["risk_per_trade"]))
-
-                # 更新允许的配置
-                self.config.update({k: v for k, v in config.items() if v is not None})
-
-            # 确保交易对保持固定
-            self.config["symbols"] = self.FIXED_SYMBOLS
+            # 记录用户期望的模式
+            preferred_mode = clean.get("mode")
 
             # 加载数据库中的API密钥等敏感配置
             try:
@@ -153,35 +316,36 @@ class UserTradingSystem:
                 logger.error(f"❌ 无法加载用户 {self.username} 的交易配置: {runtime_error}")
                 self.state = TradingSystemState.ERROR
                 self.stats["last_error"] = str(runtime_error)
+                self._status_cache = None
                 return {
                     "success": False,
                     "message": str(runtime_error),
                     "state": self.state,
                 }
 
-            self.config.update(runtime_overrides)
+            # 一次合并：用户输入的交易对被固定值取代，数据库配置优先级最高
+            self.config |= {**clean, "symbols": list(self.FIXED_SYMBOLS), **runtime_overrides}
+            self._safe_config_cached = None
             
-            logger.info(f"🚀 正在启动用户 {self.username} 的交易系统... 模式: {self.config['mode']}")
+            logger.info("🚀 正在启动用户 %s 的交易系统... 模式: %s", self.username, self.config['mode'])
             self.state = TradingSystemState.STARTING
             
-            # 重置停止事件
-            self.stop_event.clear()
-            
-            # 启动交易系统线程
-            self.trading_thread = threading.Thread(
-                target=self._run_trading_system,
-                daemon=True,
-                name=f"Trading-{self.user_id}"
+            # 新的停止事件，并把交易任务提交到共享事件循环
+            self.stop_event = asyncio.Event()
+            self.ready_event.clear()
+            self.failed_event.clear()
+            self._run_future = asyncio.run_coroutine_threadsafe(
+                self._run_trading_system(),
+                _LoopThread.get_loop()
             )
-            self.trading_thread.start()
             
-            # 等待系统初始化
-            import time
-            time.sleep(2)
+            # 等待系统初始化（进入运行状态或失败时立即返回）
+            self.ready_event.wait(timeout=10)
             
-            if self.state == TradingSystemState.RUNNING:
-                self.stats["start_time"] = datetime.now().isoformat()
-                logger.info(f"✅ 用户 {self.username} 的交易系统启动成功")
+            if self.state == TradingSystemState.RUNNING and not self.failed_event.is_set():
+                self.stats["start_time"] = time.time()
+                self._status_cache = None
+                logger.info("✅ 用户 %s 的交易系统启动成功", self.username)
                 return {
                     "success": True,
                     "message": f"用户 {self.username} 的交易系统启动成功",
@@ -200,6 +364,7 @@ class UserTradingSystem:
             logger.error(f"❌ 启动用户 {self.username} 的交易系统时出错: {e}")
             self.state = TradingSystemState.ERROR
             self.stats["last_error"] = str(e)
+            self._status_cache = None
             return {
                 "success": False,
                 "message": f"启动失败: {str(e)}",
@@ -216,11 +381,11 @@ class UserTradingSystem:
                     "state": self.state
                 }
             
-            logger.info(f"🛑 正在停止用户 {self.username} 的交易系统...")
+            logger.info("🛑 正在停止用户 %s 的交易系统...", self.username)
             self.state = TradingSystemState.STOPPING
             
-            # 发送停止信号
-            self.stop_event.set()
+            # 发送停止信号（asyncio.Event 需在事件循环线程内设置）
+            _LoopThread.get_loop().call_soon_threadsafe(self.stop_event.set)
             
             # 停止交易系统实例
             if self.trading_system:
@@ -230,14 +395,14 @@ class UserTradingSystem:
                 except Exception as e:
                     logger.error(f"停止交易系统实例时出错: {e}")
             
-            # 等待线程结束
-            if self.trading_thread and self.trading_thread.is_alive():
-                self.trading_thread.join(timeout=10)
+            # 等待交易任务结束
+            self._wait_run_finished(self.STOP_TIMEOUT)
             
             self.state = TradingSystemState.STOPPED
-            self.stats["stop_time"] = datetime.now().isoformat()
+            self.stats["stop_time"] = time.time()
+            self._status_cache = None
             
-            logger.info(f"✅ 用户 {self.username} 的交易系统已停止")
+            logger.info("✅ 用户 %s 的交易系统已停止", self.username)
             return {
                 "success": True,
                 "message": f"用户 {self.username} 的交易系统已停止",
@@ -248,15 +413,41 @@ class UserTradingSystem:
             logger.error(f"❌ 停止用户 {self.username} 的交易系统时出错: {e}")
             self.state = TradingSystemState.ERROR
             self.stats["last_error"] = str(e)
+            self._status_cache = None
             return {
                 "success": False,
                 "message": f"停止失败: {str(e)}",
                 "state": self.state
             }
     
+    def _wait_run_finished(self, timeout: float):
+        """
+        分片等待交易任务结束，总时长不超过 timeout 秒
+        
+        每个分片结束后重新发出停止信号（直接置位引擎自身的 stop_event，
+        不重复调用会打印统计的 stop()），任务一结束立即返回
+        """
+        future = self._run_future
+        if future is None:
+            return
+        deadline = time.monotonic() + timeout
+        while not future.done():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f"⚠️ 用户 {self.username} 的交易任务未在 {timeout:g} 秒内结束")
+                return
+            try:
+                future.result(timeout=min(self.STOP_POLL_INTERVAL, remaining))
+            except concurrent.futures.TimeoutError:
+                engine_stop_event = getattr(self.trading_system, "stop_event", None)
+                if isinstance(engine_stop_event, threading.Event):
+                    engine_stop_event.set()
+            except Exception:
+                return
+    
     def restart(self, config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """重启用户的交易系统"""
-        logger.info(f"🔄 正在重启用户 {self.username} 的交易系统...")
+        logger.info("🔄 正在重启用户 %s 的交易系统...", self.username)
         
         # 先停止
         stop_result = self.stop()
@@ -264,7 +455,6 @@ class UserTradingSystem:
             return stop_result
         
         # 等待完全停止
-        import time
         time.sleep(2)
         
         # 再启动
@@ -274,124 +464,169 @@ class UserTradingSystem:
     # 交易系统运行逻辑
     # ========================================================================
     
-    def _run_trading_system(self):
-        """在后台线程中运行交易系统"""
+    def _create_engine(self):
+        """创建用户专属的交易系统实例（阻塞，在工作线程中调用）"""
+        LiveTradingEngine = _get_engine_cls()
+        
+        # 一次遍历构造参数，跳过 None（避免覆盖引擎默认值）
+        config = self.config
+        engine_kwargs = {
+            dest: value
+            for dest, src in _ENGINE_KWARG_MAP
+            if (value := config.get(src)) is not None
+        }
+        engine_kwargs["user_id"] = self.user_id
+
+        return LiveTradingEngine(**engine_kwargs)
+    
+    async def _run_trading_system(self):
+        """在共享事件循环中运行交易系统"""
+        thread_name = f"Trading-{self.user_id}"
         try:
-            logger.info(f"📊 用户 {self.username} 的交易系统线程启动")
+            logger.info("📊 用户 %s 的交易任务启动", self.username)
             
-            # 导入交易系统（延迟导入避免循环依赖）
             try:
-                from bybit_live_trading_system import LiveTradingEngine
-                
-                # 创建用户专属的交易系统实例
-                engine_kwargs = {
-                    "user_id": self.user_id,
-                    "mode": self.config.get("mode"),
-                    "symbols": self.config.get("symbols"),
-                    "check_interval": self.config.get("check_interval"),
-                    "bybit_api_key": self.config.get("bybit_api_key"),
-                    "bybit_api_secret": self.config.get("bybit_api_secret"),
-                    "use_testnet": self.config.get("use_testnet"),
-                    "use_demo": self.config.get("use_demo"),
-                    "deepseek_api_key": self.config.get("deepseek_api_key"),
-                    "deepseek_model": self.config.get("deepseek_model"),
-                    "deepseek_system_prompt": self.config.get("deepseek_system_prompt"),
-                    "trading_interval": self.config.get("trading_interval"),
-                    "max_position_pct": self.config.get("max_position_pct"),
-                    "default_leverage": self.config.get("default_leverage"),
-                    "use_trailing_stop": self.config.get("use_trailing_stop"),
-                }
-
-                engine_kwargs = {k: v for k, v in engine_kwargs.items() if v is not None}
-
-                self.trading_system = LiveTradingEngine(**engine_kwargs)
+                self.trading_system = await _run_in_daemon_thread(self._create_engine, thread_name)
                 
-                logger.info(f"✅ 用户 {self.username} 的交易系统实例创建成功")
+                logger.info("✅ 用户 %s 的交易系统实例创建成功", self.username)
                 self.state = TradingSystemState.RUNNING
+                self.ready_event.set()
                 
-                # 运行交易系统（阻塞调用）
-                self.trading_system.run()
+                # 运行交易系统（阻塞调用，只有真实引擎才占用独立线程）
+                await _run_in_daemon_thread(self.trading_system.run, thread_name)
                 
             except ImportError as e:
                 logger.error(f"❌ 无法导入交易系统: {e}")
-                logger.info(f"⚠️ 用户 {self.username} 使用模拟交易系统")
+                logger.info("⚠️ 用户 %s 使用模拟交易系统", self.username)
                 self.state = TradingSystemState.RUNNING
+                self.ready_event.set()
                 
                 # 模拟交易系统
-                self._run_mock_trading_system()
+                await self._run_mock_trading_system()
             
         except Exception as e:
             logger.error(f"❌ 用户 {self.username} 的交易系统运行错误: {e}")
             self.state = TradingSystemState.ERROR
             self.stats["last_error"] = str(e)
+            self._status_cache = None
+            self.failed_event.set()
         finally:
-            logger.info(f"📊 用户 {self.username} 的交易系统线程结束")
+            logger.info("📊 用户 %s 的交易任务结束", self.username)
             if self.state != TradingSystemState.ERROR:
                 self.state = TradingSystemState.STOPPED
+            # 任务结束（含 run() 直接返回）时唤醒仍在等待的 start()
+            self.ready_event.set()
     
-    def _run_mock_trading_system(self):
+    @staticmethod
+    async def _wait_stop(stop_waiter: asyncio.Future, timeout: float) -> bool:
+        """等待停止信号，最多 timeout 秒；返回是否已收到停止信号"""
+        done, _ = await asyncio.wait((stop_waiter,), timeout=timeout)
+        return bool(done)
+    
+    async def _run_mock_trading_system(self):
         """模拟交易系统（用于开发/测试）"""
-        logger.info(f"🎭 运行用户 {self.username} 的模拟交易系统")
+        logger.info("🎭 运行用户 %s 的模拟交易系统", self.username)
         
-        import time
-        import random
+        # 随机数按批预生成，每个周期只做数组索引
+        batch_size = 1024
+        rng = np.random.default_rng()
+        symbols = tuple(self.config["symbols"])
+        i = batch_size
         
-        while not self.stop_event.is_set():
-            try:
-                # 模拟交易逻辑
-                if random.random() > 0.8:  # 20% 概率生成交易
-                    trade_type = random.choice(["buy", "sell"])
-                    symbol = random.choice(self.config["symbols"])
+        # 整个运行期间只创建一个等待停止信号的任务；每个周期只在共享事件循环的
+        # 定时器堆上登记一次唤醒，而不是每轮都新建 wait_for 任务
+        stop_waiter = asyncio.ensure_future(self.stop_event.wait())
+        
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    if i >= batch_size:
+                        trade_rolls = rng.random(batch_size)
+                        trade_types = rng.integers(0, 2, batch_size)
+                        trade_symbols = rng.integers(0, len(symbols), batch_size)
+                        success_rolls = rng.random(batch_size)
+                        pnls = rng.uniform(-100, 200, batch_size)
+                        positions = rng.integers(0, 4, batch_size)
+                        i = 0
+                
+                    # 模拟交易逻辑
+                    if trade_rolls[i] > 0.8:  # 20% 概率生成交易
+                        trade_type = ("buy", "sell")[trade_types[i]]
+                        symbol = symbols[trade_symbols[i]]
                     
-                    logger.info(f"📈 用户 {self.username} 模拟交易: {trade_type.upper()} {symbol}")
+                        if logger.isEnabledFor(logging.INFO):
+                            logger.info("📈 用户 %s 模拟交易: %s %s", self.username, trade_type.upper(), symbol)
                     
-                    self.stats["total_trades"] += 1
-                    if random.random() > 0.3:  # 70% 成功率
-                        self.stats["successful_trades"] += 1
-                        pnl = random.uniform(-100, 200)
-                        self.stats["total_pnl"] += pnl
-                    else:
-                        self.stats["failed_trades"] += 1
+                        self.stats["total_trades"] += 1
+                        if success_rolls[i] > 0.3:  # 70% 成功率
+                            self.stats["successful_trades"] += 1
+                            self.stats["total_pnl"] += float(pnls[i])
+                        else:
+                            self.stats["failed_trades"] += 1
                 
-                # 模拟持仓数量
-                self.stats["active_positions"] = random.randint(0, 3)
+                    # 模拟持仓数量
+                    self.stats["active_positions"] = int(positions[i])
+                    self._status_cache = None
+                    i += 1
                 
-                # 休眠一段时间
-                check_interval = self.config.get("check_interval", 60)
-                self.stop_event.wait(timeout=check_interval)
+                    # 休眠一段时间（收到停止信号立即退出，不再多跑一轮）
+                    check_interval = self.config.get("check_interval", 60)
+                    if await self._wait_stop(stop_waiter, check_interval):
+                        break
                 
-            except Exception as e:
-                logger.error(f"用户 {self.username} 模拟交易系统错误: {e}")
-                time.sleep(5)
+                except Exception as e:
+                    logger.error(f"用户 {self.username} 模拟交易系统错误: {e}")
+                    # 出错退避期间同样可被 stop() 立即唤醒
+                    if await self._wait_stop(stop_waiter, 5):
+                        break
+        finally:
+            stop_waiter.cancel()
         
-        logger.info(f"🎭 用户 {self.username} 的模拟交易系统已停止")
+        logger.info("🎭 用户 %s 的模拟交易系统已停止", self.username)
     
     # ========================================================================
     # 状态查询
     # ========================================================================
     
     def get_status(self) -> Dict[str, Any]:
-        """获取交易系统状态"""
-        return {
+        """获取交易系统状态（缓存 STATUS_CACHE_TTL 秒，吸收面板轮询）"""
+        now = time.monotonic()
+        cached = self._status_cache
+        if cached is not None and now - self._status_cache_ts < self.STATUS_CACHE_TTL:
+            return cached
+        
+        status = {
             "user_id": self.user_id,
             "username": self.username,
             "state": self.state,
             "is_running": self.state == TradingSystemState.RUNNING,
             "config": self._safe_config(),
-            "stats": self.stats,
-            "thread_alive": self.trading_thread.is_alive() if self.trading_thread else False
+            "stats": self._stats_snapshot(),
+            "thread_alive": self._run_future is not None and not self._run_future.done()
         }
+        self._status_cache_ts = now
+        self._status_cache = status
+        return status
+    
+    def _stats_snapshot(self) -> Dict[str, Any]:
+        """复制统计数据，内部的 time.time() 时间戳在此转换为 ISO 字符串"""
+        stats = dict(self.stats)
+        for key in ("start_time", "stop_time"):
+            if stats[key] is not None:
+                stats[key] = datetime.fromtimestamp(stats[key]).isoformat()
+        return stats
     
     def _safe_config(self) -> Dict[str, Any]:
-        """返回安全的配置（隐藏敏感信息）"""
+        """返回安全的配置（隐藏敏感信息），配置未变化时复用上次结果"""
+        return self._safe_config_cached or self._rebuild_safe_config()
+    
+    def _rebuild_safe_config(self) -> Dict[str, Any]:
+        """重新生成脱敏配置并缓存"""
         safe_config = self.config.copy()
         # 隐藏 API 密钥
-        if "bybit_api_key" in safe_config:
-            safe_config["bybit_api_key"] = "***" if safe_config["bybit_api_key"] else None
-        if "bybit_api_secret" in safe_config:
-            safe_config["bybit_api_secret"] = "***" if safe_config["bybit_api_secret"] else None
-        if "deepseek_api_key" in safe_config:
-            safe_config["deepseek_api_key"] = "***" if safe_config["deepseek_api_key"] else None
+        for key in self._SECRET_KEYS & safe_config.keys():
+            safe_config[key] = "***" if safe_config[key] else None
+        self._safe_config_cached = safe_config
         return safe_config
     
     def get_positions(self) -> List[Dict[str, Any]]:
@@ -421,29 +656,20 @@ class MultiUserTradingManager:
     """
     多用户交易系统管理器
     
-    管理多个用户各自的交易系统实例
+    管理多个用户各自的交易系统实例。
+    单例在模块导入时创建（导入锁保证线程安全），请通过 get_multi_user_trading_manager() 获取。
     """
     
-    _instance = None
-    _lock = threading.Lock()
-    
-    def __new__(cls):
-        """单例模式"""
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-                    cls._instance._initialized = False
-        return cls._instance
-    
     def __init__(self):
         """初始化管理器"""
-        if self._initialized:
-            return
-            
-        self._initialized = True
-        self.user_systems: Dict[str, UserTradingSystem] = {}
+        # 写时复制：写操作在锁内构造新字典后整体替换，读操作直接读取只读快照，无需加锁
+        self.user_systems: Mapping[str, UserTradingSystem] = MappingProxyType({})
+        self.running_user_ids: frozenset = frozenset()
+        self.user_count = 0
+        # 仅用于串行化快照发布（复制-修改-替换），读操作从不获取
         self.lock = threading.Lock()
+        # 运行中用户快照单独加锁：状态回调来自事件循环线程，不应与创建/移除争用 self.lock
+        self._running_lock = threading.Lock()
         
         logger.info("✅ 多用户交易系统管理器初始化完成")
     
@@ -462,11 +688,36 @@ class MultiUserTradingManager:
         Returns:
             用户的交易系统实例
         """
+        # 已存在时直接读快照，不加锁（每个 API 请求都会走这里）
+        user_system = self.user_systems.get(user_id)
+        if user_system:
+            return user_system
+        
+        # 实例在锁外构造；并发创建时只有先发布的生效，多余实例直接丢弃
+        new_system = UserTradingSystem(
+            user_id, username, on_state_change=self._on_user_state_change
+        )
         with self.lock:
-            if user_id not in self.user_systems:
-                self.user_systems[user_id] = UserTradingSystem(user_id, username)
-                logger.info(f"✅ 为用户 {username} 创建交易系统实例")
-            return self.user_systems[user_id]
+            user_system = self.user_systems.get(user_id)
+            if user_system is not None:
+                return user_system
+            systems = dict(self.user_systems)
+            systems[user_id] = new_system
+            self.user_systems = MappingProxyType(systems)
+            self.user_count = len(systems)
+        logger.info(f"✅ 为用户 {username} 创建交易系统实例")
+        return new_system
+    
+    def _on_user_state_change(self, user_system: UserTradingSystem):
+        """用户系统状态变化时更新运行中用户快照（读取状态与比较都在锁内，避免并发变化时丢失更新）"""
+        with self._running_lock:
+            is_running = user_system.state == TradingSystemState.RUNNING
+            if is_running == (user_system.user_id in self.running_user_ids):
+                return
+            if is_running:
+                self.running_user_ids = self.running_user_ids | {user_system.user_id}
+            else:
+                self.running_user_ids = self.running_user_ids - {user_system.user_id}
     
     def get_user_system(self, user_id: str) -> Optional[UserTradingSystem]:
         """
@@ -490,17 +741,21 @@ class MultiUserTradingManager:
         Returns:
             是否成功移除
         """
+        # 锁内只负责从快照中摘除（发布新快照），停止交易系统放到锁外，
+        # 避免 stop() 最长 10 秒的等待阻塞其他用户的创建/移除
         with self.lock:
-            if user_id in self.user_systems:
-                user_system = self.user_systems[user_id]
-                # 先停止
-                if user_system.state == TradingSystemState.RUNNING:
-                    user_system.stop()
-                # 移除
-                del self.user_systems[user_id]
-                logger.info(f"✅ 移除用户 {user_system.username} 的交易系统实例")
-                return True
-            return False
+            user_system = self.user_systems.get(user_id)
+            if user_system is None:
+                return False
+            systems = dict(self.user_systems)
+            del systems[user_id]
+            self.user_systems = MappingProxyType(systems)
+            self.user_count = len(systems)
+        
+        if user_system.state == TradingSystemState.RUNNING:
+            user_system.stop()
+        logger.info(f"✅ 移除用户 {user_system.username} 的交易系统实例")
+        return True
     
     # ========================================================================
     # 生命周期管理（用户级别）
@@ -536,6 +791,40 @@ class MultiUserTradingManager:
             "message": "用户交易系统不存在"
         }
     
+    def stop_all_users(self, timeout: float = 10) -> Dict[str, Dict[str, Any]]:
+        """
+        并行停止所有未停止的用户交易系统
+        
+        每个用户的 stop() 最长等待 10 秒，并行执行后总耗时取决于最慢的用户，
+        而不是所有用户之和
+        
+        Args:
+            timeout: 等待单个用户停止结果的超时（秒）
+            
+        Returns:
+            用户ID -> 停止结果
+        """
+        users = [
+            user_system for user_system in self.user_systems.values()
+            if user_system.state != TradingSystemState.STOPPED
+        ]
+        if not users:
+            return {}
+        
+        results: Dict[str, Dict[str, Any]] = {}
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(32, len(users)),
+            thread_name_prefix="stop-user"
+        ) as executor:
+            futures = {user.user_id: executor.submit(user.stop) for user in users}
+            for user_id, future in futures.items():
+                try:
+                    results[user_id] = future.result(timeout=timeout)
+                except Exception as e:
+                    logger.error(f"停止用户 {user_id} 的交易系统失败: {e}")
+                    results[user_id] = {"success": False, "message": f"停止失败: {str(e)}"}
+        return results
+    
     def restart_for_user(
         self, 
         user_id: str, 
@@ -563,18 +852,11 @@ class MultiUserTradingManager:
     
     def get_all_users_status(self) -> List[Dict[str, Any]]:
         """获取所有用户的交易系统状态"""
-        statuses = []
-        for user_id, user_system in self.user_systems.items():
-            statuses.append(user_system.get_status())
-        return statuses
+        return [user_system.get_status() for user_system in self.user_systems.values()]
     
     def get_running_users(self) -> List[str]:
         """获取正在运行交易系统的用户ID列表"""
-        running_users = []
-        for user_id, user_system in self.user_systems.items():
-            if user_system.state == TradingSystemState.RUNNING:
-                running_users.append(user_id)
-        return running_users
+        return list(self.running_user_ids)
     
     # ========================================================================
     # 数据查询
@@ -587,6 +869,13 @@ class MultiUserTradingManager:
             return user_system.get_positions()
         return []
     
+    def get_snapshot_for_user(self, user_id: str) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """获取用户的交易系统状态和持仓（只查找一次用户实例，供实时推送使用）"""
+        user_system = self.get_user_system(user_id)
+        if user_system:
+            return user_system.get_status(), user_system.get_positions()
+        return None, []
+    
     def get_trades_for_user(self, user_id: str, limit: int = 100) -> List[Dict[str, Any]]:
         """获取用户的交易记录"""
         user_system = self.get_user_system(user_id)
@@ -599,6 +888,9 @@ class MultiUserTradingManager:
 # 全局单例访问
 # ============================================================================
 
+_MANAGER = MultiUserTradingManager()
+
+
 def get_multi_user_trading_manager() -> MultiUserTradingManager:
     """
     获取多用户交易系统管理器单例
@@ -606,7 +898,7 @@ def get_multi_user_trading_manager() -> MultiUserTradingManager:
     Returns:
         MultiUserTradingManager 实例
     """
-    return MultiUserTradingManager()
+    return _MANAGER
 
 
 # ============================================================================
@@ -1,27 +1,39 @@
 """
 超安全加密系统 - 军事级多层加密
-使用7层加密和混淆技术确保API密钥绝对安全
+确保API密钥绝对安全
 
-加密层级：
+当前格式（3.0）：
+1. 密钥派生：主密码根密钥（PBKDF2 100,000次迭代）+ 每条记录独立盐值的 HKDF-Expand
+2. AES-256-GCM加密（对称加密）
+3. X25519 + ChaCha20-Poly1305 信封加密（非对称加密）
+
+旧格式（1.0/2.0，仅解密）为7层加密：
 1. 密钥派生函数 (PBKDF2) - 100,000次迭代
 2. AES-256-GCM加密（对称加密）
-3. RSA-4096加密（非对称加密）
+3. RSA-4096加密（2.0 为 X25519 + ChaCha20-Poly1305）
 4. Fernet双重加密
 5. 自定义混淆算法
-6. Base85编码
-7. HMAC完整性校验
+6. Base85编码（后期 2.0 为 Base64）
+7. HMAC-SHA512完整性校验（后期 2.0 为 Poly1305）
 
 版本: v1.0 Military Grade
 """
 
 import os
+import asyncio
 import base64
+import functools
 import hashlib
 import secrets
-import json
-from typing import Dict, Any, Tuple
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+import numpy as np
+import orjson
+
 # 加密库
 from cryptography.hazmat.primitives import hashes, serialization
 # 修复 PBKDF2 导入 - 兼容新旧版本 cryptography
@@ -41,88 +53,188 @@ except ImportError:
         USE_PBKDF2HMAC = False
         import hashlib as _hashlib
 
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF, HKDFExpand
 from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives.asymmetric import rsa, padding as asym_padding
+from cryptography.hazmat.primitives.poly1305 import Poly1305
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric import x25519, padding as asym_padding
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
 from cryptography.fernet import Fernet
 import hmac
 
+logger = logging.getLogger(__name__)
+
+_BACKEND = default_backend()
+
+# 可选：Numba 将 XOR + 位移融合为单次遍历，不可用时回退到 NumPy
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# 可选：pybase64 提供 SIMD 加速的 Base64 编解码，不可用时回退到标准库
+try:
+    import pybase64
+except ImportError:
+    pybase64 = None
+
+_b64encode = pybase64.b64encode if pybase64 is not None else base64.b64encode
+_b64decode = pybase64.b64decode if pybase64 is not None else base64.b64decode
+
 # ============================================================================
 # 主密钥管理
 # ============================================================================
 
+# 已解析的RSA密钥对缓存：(私钥路径, 私钥文件mtime) -> (private_key, public_key)
+# 同一进程内重复初始化（模块重载等）时，文件未变化则不再重复解析PEM
+_RSA_CACHE: Dict[Tuple[str, float], Tuple[Any, Any]] = {}
+
+
+def _atomic_write(path: str, data: bytes):
+    """先写临时文件再 os.replace，避免并发启动的进程读到半写的密钥文件"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
 class MasterKeyManager:
     """主密钥管理器 - 管理系统的根密钥"""
     
     def __init__(self):
-        self.backend = default_backend()
+        self.backend = _BACKEND
         
         # 从环境变量或文件加载主密钥
-        self.master_password = os.getenv(
-            "MASTER_PASSWORD",
-            self._generate_master_password()
+        env_password = os.getenv("MASTER_PASSWORD")
+        # 未配置时使用随机生成的高熵主密码，此时无需 PBKDF2 的慢速迭代
+        self._password_is_random = env_password is None
+        self.master_password = (
+            env_password if env_password is not None else self._generate_master_password()
         )
         
-        # 盐值（每个系统唯一）
-        self.master_salt = os.getenv(
-            "MASTER_SALT",
-            base64.b64encode(secrets.token_bytes(32)).decode()
+        # 相同 (salt, length) 的派生结果缓存
+        self._derive_key_cached = functools.lru_cache(maxsize=256)(self._derive_key_uncached)
+        
+        # 盐值（每个系统唯一），内部以 bytes 保存
+        env_salt = os.getenv("MASTER_SALT")
+        self.master_salt_bytes: bytes = (
+            base64.b64decode(env_salt) if env_salt else secrets.token_bytes(32)
         )
+        self._salt_is_random = not env_salt
         
-        # 生成RSA密钥对（如果不存在）
+        # 生成X25519密钥对（如果不存在）
+        self._initialize_x25519_keys()
+        
+        # 旧版本（1.0）密文使用的RSA密钥对，仅用于解密
         self._initialize_rsa_keys()
     
+    @property
+    def master_salt(self) -> str:
+        """Base64 形式的盐值（兼容旧接口）"""
+        return base64.b64encode(self.master_salt_bytes).decode()
+    
     def _generate_master_password(self) -> str:
         """生成随机主密码"""
         return secrets.token_urlsafe(64)
     
+    def _initialize_x25519_keys(self):
+        """初始化X25519密钥对（私钥以32字节Raw格式保存，公钥由私钥推导）"""
+        private_key_path = "x25519_private.key"
+        
+        if os.path.exists(private_key_path):
+            with open(private_key_path, "rb") as f:
+                self.x25519_private_key = x25519.X25519PrivateKey.from_private_bytes(f.read())
+        else:
+            self.x25519_private_key = x25519.X25519PrivateKey.generate()
+            
+            # 保存密钥（生产环境应使用HSM或密钥管理服务）
+            _atomic_write(private_key_path, self.x25519_private_key.private_bytes(
+                encoding=serialization.Encoding.Raw,
+                format=serialization.PrivateFormat.Raw,
+                encryption_algorithm=serialization.NoEncryption()
+            ))
+            
+            print("✅ X25519密钥对已生成")
+        
+        self.x25519_public_key = self.x25519_private_key.public_key()
+    
     def _initialize_rsa_keys(self):
-        """初始化RSA密钥对"""
+        """加载旧版本的RSA密钥对（不存在时不再生成，新密文不再使用RSA）"""
         # 私钥路径
         private_key_path = "private_key.pem"
         public_key_path = "public_key.pem"
         
-        if os.path.exists(private_key_path) and os.path.exists(public_key_path):
-            # 加载现有密钥
-            with open(private_key_path, "rb") as f:
-                self.private_key = serialization.load_pem_private_key(
-                    f.read(),
-                    password=None,
-                    backend=self.backend
-                )
-            with open(public_key_path, "rb") as f:
-                self.public_key = serialization.load_pem_public_key(
-                    f.read(),
-                    backend=self.backend
-                )
-        else:
-            # 生成新密钥对（RSA-4096）
-            self.private_key = rsa.generate_private_key(
-                public_exponent=65537,
-                key_size=4096,
+        self.private_key = None
+        self.public_key = None
+        if not (os.path.exists(private_key_path) and os.path.exists(public_key_path)):
+            return
+        
+        cache_key = (os.path.abspath(private_key_path), os.path.getmtime(private_key_path))
+        cached = _RSA_CACHE.get(cache_key)
+        if cached is not None:
+            self.private_key, self.public_key = cached
+            return
+        
+        # 加载现有密钥
+        with open(private_key_path, "rb") as f:
+            self.private_key = serialization.load_pem_private_key(
+                f.read(),
+                password=None,
                 backend=self.backend
             )
-            self.public_key = self.private_key.public_key()
-            
-            # 保存密钥（生产环境应使用HSM或密钥管理服务）
-            with open(private_key_path, "wb") as f:
-                f.write(self.private_key.private_bytes(
-                    encoding=serialization.Encoding.PEM,
-                    format=serialization.PrivateFormat.PKCS8,
-                    encryption_algorithm=serialization.NoEncryption()
-                ))
-            with open(public_key_path, "wb") as f:
-                f.write(self.public_key.public_bytes(
-                    encoding=serialization.Encoding.PEM,
-                    format=serialization.PublicFormat.SubjectPublicKeyInfo
-                ))
-            
-            print("✅ RSA-4096密钥对已生成")
+        with open(public_key_path, "rb") as f:
+            self.public_key = serialization.load_pem_public_key(
+                f.read(),
+                backend=self.backend
+            )
+        _RSA_CACHE[cache_key] = (self.private_key, self.public_key)
     
     def derive_key(self, salt: bytes, length: int = 32) -> bytes:
-        """使用PBKDF2派生密钥"""
+        """
+        派生密钥
+        
+        随机生成的主密码使用 HKDF-SHA256；人工配置的 MASTER_PASSWORD 仍使用
+        PBKDF2（100,000次迭代），保证已有密文可解密。结果按 (salt, length) 缓存。
+        """
+        return self._derive_key_cached(bytes(salt), length)
+    
+    @functools.cached_property
+    def _record_master_key(self) -> bytes:
+        """
+        记录密钥展开所用的根密钥，每个进程只做一次慢速派生
+        
+        未配置 MASTER_SALT 时盐值每次启动随机生成，改用固定标签，
+        保证仅配置 MASTER_PASSWORD 时密文在重启后仍可解密
+        """
+        salt = b"ultra_security/record-keys" if self._salt_is_random else self.master_salt_bytes
+        return self._derive_key_uncached(salt, 32)
+    
+    def expand_record_keys(self, salt: bytes) -> Tuple[bytes, bytes]:
+        """
+        由单条记录的盐值展开 (AES密钥, HMAC密钥)
+        
+        HKDF-Expand 只需几次 HMAC 运算；两把密钥取自同一次 96 字节输出的不同区段
+        """
+        okm = HKDFExpand(
+            algorithm=hashes.SHA256(),
+            length=32 + 64,
+            info=salt,
+            backend=self.backend
+        ).derive(self._record_master_key)
+        return okm[:32], okm[32:]
+    
+    def _derive_key_uncached(self, salt: bytes, length: int) -> bytes:
         key_material = self.master_password.encode()
         
+        if self._password_is_random and len(self.master_password) >= 32:
+            return HKDF(
+                algorithm=hashes.SHA256(),
+                length=length,
+                salt=salt,
+                info=b"ultra_security",
+                backend=self.backend
+            ).derive(key_material)
+        
         # 优先使用 cryptography 库
         if PBKDF2_CLASS is not None:
             try:
@@ -166,63 +278,121 @@ master_key_manager = MasterKeyManager()
 # 第1层：自定义混淆算法
 # ============================================================================
 
+if njit is not None:
+    @njit(cache=True, boundscheck=False)
+    def _xor_rotate(src, key, out):
+        """XOR 后循环左移3位，单次遍历写入 out（允许 out 与 src 为同一数组）"""
+        key_size = key.size
+        for i in range(src.size):
+            b = src[i] ^ key[i % key_size]
+            out[i] = ((b << 3) | (b >> 5)) & 0xFF
+    
+    @njit(cache=True, boundscheck=False)
+    def _unrotate_xor(src, key, out):
+        """循环右移3位后 XOR，_xor_rotate 的逆运算"""
+        key_size = key.size
+        for i in range(src.size):
+            b = src[i]
+            out[i] = (((b >> 3) | (b << 5)) & 0xFF) ^ key[i % key_size]
+    
+    # 预热：导入时完成 JIT 编译，避免首次加解密承担编译耗时
+    _warmup = np.zeros(1, dtype=np.uint8)
+    _xor_rotate(_warmup, np.ones(1, dtype=np.uint8), _warmup)
+    _unrotate_xor(_warmup, np.ones(1, dtype=np.uint8), _warmup)
+else:
+    def _xor_rotate(src, key, out):
+        """XOR 后循环左移3位，结果写入 out（允许 out 与 src 为同一数组）"""
+        np.bitwise_xor(src, np.resize(key, src.size), out=out)
+        high_bits = out >> 5
+        np.left_shift(out, 3, out=out)
+        np.bitwise_or(out, high_bits, out=out)
+    
+    def _unrotate_xor(src, key, out):
+        """循环右移3位后 XOR，_xor_rotate 的逆运算"""
+        np.bitwise_or(src >> 3, src << 5, out=out)
+        np.bitwise_xor(out, np.resize(key, src.size), out=out)
+
+
+# 线程本地的混淆缓冲区，避免每次混淆都分配新的 bytearray
+_scratch = threading.local()
+
+
+def _scratch_buffer(size: int) -> bytearray:
+    """获取至少 size 字节的线程本地缓冲区（容量不足时换用更大的缓冲区）"""
+    buf = getattr(_scratch, "buf", None)
+    if buf is None or len(buf) < size:
+        buf = _scratch.buf = bytearray(max(size, 4096))
+    return buf
+
+
 class CustomObfuscator:
     """自定义混淆器 - 增加逆向工程难度"""
     
     @staticmethod
     def obfuscate(data: bytes) -> bytes:
         """混淆数据"""
-        # 1. 添加随机噪声
-        noise = secrets.token_bytes(16)
-        data_with_noise = noise + data + noise
-        
-        # 2. XOR混淆
+        # 结果布局：key长度(1) + key + checksum(8) + shifted_data
+        # 各步骤直接在线程本地的复用缓冲区中原地写入，最后只复制一次
         key = secrets.token_bytes(32)
-        xor_data = bytes(a ^ b for a, b in zip(data_with_noise, key * (len(data_with_noise) // len(key) + 1)))
+        key_len = len(key)
+        offset = 1 + key_len + 8
+        payload_len = len(data) + 32
+        end = offset + payload_len
+        buf = _scratch_buffer(end)
+        buf[0] = key_len
+        buf[1:1+key_len] = key
         
-        # 3. 位移混淆
-        shifted = bytes((b << 3 | b >> 5) & 0xFF for b in xor_data)
+        # 1. 添加随机噪声
+        noise = secrets.token_bytes(16)
+        buf[offset:offset+16] = noise
+        buf[offset+16:end-16] = data
+        buf[end-16:end] = noise
         
-        # 4. 添加校验和
-        checksum = hashlib.sha256(shifted).digest()[:8]
+        # 2-3. XOR混淆 + 位移混淆（uint8 循环左移3位），原地完成
+        payload = np.frombuffer(buf, dtype=np.uint8, count=payload_len, offset=offset)
+        _xor_rotate(payload, np.frombuffer(key, dtype=np.uint8), payload)
         
-        # 5. 组合：key长度(1) + key + checksum + shifted_data
-        result = bytes([len(key)]) + key + checksum + shifted
+        # 4. 添加校验和（BLAKE2b-64）
+        view = memoryview(buf)
+        buf[1+key_len:offset] = hashlib.blake2b(view[offset:end], digest_size=8).digest()
         
-        return result
+        return bytes(view[:end])
     
     @staticmethod
     def deobfuscate(obfuscated: bytes) -> bytes:
         """反混淆"""
+        # 各字段通过 memoryview 切片引用，不复制原始数据
+        view = memoryview(obfuscated)
+        
         # 1. 提取key长度
-        key_len = obfuscated[0]
+        key_len = view[0]
         
         # 2. 提取key和checksum
-        key = obfuscated[1:1+key_len]
-        checksum = obfuscated[1+key_len:1+key_len+8]
-        shifted = obfuscated[1+key_len+8:]
-        
-        # 3. 验证校验和
-        if hashlib.sha256(shifted).digest()[:8] != checksum:
+        key = view[1:1+key_len]
+        checksum = bytes(view[1+key_len:1+key_len+8])
+        shifted = view[1+key_len+8:]
+        
+        # 3. 验证校验和（早期数据使用 SHA-256 截断的校验和）
+        if (
+            hashlib.blake2b(shifted, digest_size=8).digest() != checksum
+            and hashlib.sha256(shifted).digest()[:8] != checksum
+        ):
             raise ValueError("数据完整性校验失败")
         
-        # 4. 反向位移
-        xor_data = bytes((b >> 3 | b << 5) & 0xFF for b in shifted)
-        
-        # 5. 反向XOR
-        data_with_noise = bytes(a ^ b for a, b in zip(xor_data, key * (len(xor_data) // len(key) + 1)))
+        # 4-5. 反向位移 + 反向XOR
+        shifted_arr = np.frombuffer(shifted, dtype=np.uint8)
+        data_with_noise = np.empty_like(shifted_arr)
+        _unrotate_xor(shifted_arr, np.frombuffer(key, dtype=np.uint8), data_with_noise)
         
         # 6. 移除噪声
-        data = data_with_noise[16:-16]
-        
-        return data
+        return data_with_noise[16:-16].tobytes()
 
 # ============================================================================
 # 第2层：AES-256-GCM加密
 # ============================================================================
 
 class AESEncryptor:
-    """AES-256-GCM加密器"""
+    """AES-256-GCM加密器（AEAD 单次调用接口）"""
     
     @staticmethod
     def encrypt(data: bytes, key: bytes) -> Dict[str, bytes]:
@@ -230,39 +400,109 @@ class AESEncryptor:
         # 生成随机IV
         iv = secrets.token_bytes(12)
         
-        # 创建加密器
-        cipher = Cipher(
-            algorithms.AES(key),
-            modes.GCM(iv),
-            backend=default_backend()
-        )
-        encryptor = cipher.encryptor()
-        
-        # 加密数据
-        ciphertext = encryptor.update(data) + encryptor.finalize()
+        # 加密数据（输出末尾16字节为认证标签）
+        sealed = AESGCM(key).encrypt(iv, data, None)
         
         return {
             'iv': iv,
-            'ciphertext': ciphertext,
-            'tag': encryptor.tag
+            'ciphertext': sealed[:-16],
+            'tag': sealed[-16:]
         }
     
     @staticmethod
     def decrypt(encrypted: Dict[str, bytes], key: bytes) -> bytes:
         """AES-256-GCM解密"""
-        cipher = Cipher(
-            algorithms.AES(key),
-            modes.GCM(encrypted['iv'], encrypted['tag']),
-            backend=default_backend()
+        return AESGCM(key).decrypt(
+            encrypted['iv'],
+            encrypted['ciphertext'] + encrypted['tag'],
+            None
         )
-        decryptor = cipher.decryptor()
-        
-        return decryptor.update(encrypted['ciphertext']) + decryptor.finalize()
 
 # ============================================================================
-# 第3层：RSA-4096加密
+# 第3层：X25519 + ChaCha20-Poly1305 信封加密
+# ============================================================================
+
+class X25519Encryptor:
+    """
+    X25519 + ChaCha20-Poly1305 信封加密器
+    
+    临时X25519密钥与主公钥协商共享密钥，经 HKDF-SHA256 派生出
+    ChaCha20-Poly1305 数据密钥。输出格式：临时公钥(32) + nonce(12) + 密文
+    
+    临时密钥及数据密钥每个进程只生成一次（KEK/DEK 模式，进程重启即轮换），
+    之后每条记录仅使用新的随机 nonce；解密端按临时公钥缓存数据密钥
+    """
+    
+    PUBLIC_KEY_SIZE = 32
+    NONCE_SIZE = 12
+    HKDF_INFO = b"ultra_security/x25519-chacha20poly1305"
+    
+    # 本进程的 (临时公钥, 数据密钥)
+    _session: Optional[Tuple[bytes, ChaCha20Poly1305]] = None
+    
+    @classmethod
+    def _derive_key(cls, shared_secret: bytes, ephemeral_public: bytes) -> bytes:
+        return HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=ephemeral_public,
+            info=cls.HKDF_INFO,
+            backend=master_key_manager.backend
+        ).derive(shared_secret)
+    
+    @classmethod
+    def _get_session(cls) -> Tuple[bytes, ChaCha20Poly1305]:
+        """获取本进程的数据密钥（首次调用时完成密钥协商）"""
+        session = cls._session
+        if session is None:
+            ephemeral_key = x25519.X25519PrivateKey.generate()
+            ephemeral_public = ephemeral_key.public_key().public_bytes(
+                encoding=serialization.Encoding.Raw,
+                format=serialization.PublicFormat.Raw
+            )
+            shared_secret = ephemeral_key.exchange(master_key_manager.x25519_public_key)
+            key = cls._derive_key(shared_secret, ephemeral_public)
+            session = cls._session = (ephemeral_public, ChaCha20Poly1305(key))
+        return session
+    
+    @classmethod
+    @functools.lru_cache(maxsize=256)
+    def _peer_cipher(cls, ephemeral_public: bytes) -> ChaCha20Poly1305:
+        """由密文中的临时公钥恢复数据密钥"""
+        shared_secret = master_key_manager.x25519_private_key.exchange(
+            x25519.X25519PublicKey.from_public_bytes(ephemeral_public)
+        )
+        return ChaCha20Poly1305(cls._derive_key(shared_secret, ephemeral_public))
+    
+    @classmethod
+    def encrypt(cls, data: bytes) -> bytes:
+        """使用主公钥加密"""
+        ephemeral_public, cipher = cls._get_session()
+        nonce = secrets.token_bytes(cls.NONCE_SIZE)
+        ciphertext = cipher.encrypt(nonce, data, ephemeral_public)
+        return ephemeral_public + nonce + ciphertext
+    
+    @classmethod
+    def decrypt(cls, encrypted: bytes) -> bytes:
+        """使用主私钥解密"""
+        ephemeral_public = encrypted[:cls.PUBLIC_KEY_SIZE]
+        nonce = encrypted[cls.PUBLIC_KEY_SIZE:cls.PUBLIC_KEY_SIZE + cls.NONCE_SIZE]
+        ciphertext = encrypted[cls.PUBLIC_KEY_SIZE + cls.NONCE_SIZE:]
+        
+        return cls._peer_cipher(ephemeral_public).decrypt(nonce, ciphertext, ephemeral_public)
+
+# ============================================================================
+# 旧版本第3层：RSA-4096加密（仅用于解密 1.0 版本密文）
 # ============================================================================
 
+# RSA-OAEP 填充参数（不可变，所有加解密调用共用）
+_OAEP_SHA512 = asym_padding.OAEP(
+    mgf=asym_padding.MGF1(algorithm=hashes.SHA512()),
+    algorithm=hashes.SHA512(),
+    label=None
+)
+
+
 class RSAEncryptor:
     """RSA-4096加密器"""
     
@@ -270,20 +510,11 @@ class RSAEncryptor:
     def encrypt(data: bytes) -> bytes:
         """RSA公钥加密"""
         # RSA加密有长度限制，需要分块
-        max_chunk_size = 446  # 4096位密钥，OAEP填充
+        max_chunk_size = 382  # 4096位密钥，OAEP-SHA512填充：512 - 2*64 - 2
         chunks = [data[i:i+max_chunk_size] for i in range(0, len(data), max_chunk_size)]
         
-        encrypted_chunks = []
-        for chunk in chunks:
-            encrypted_chunk = master_key_manager.public_key.encrypt(
-                chunk,
-                asym_padding.OAEP(
-                    mgf=asym_padding.MGF1(algorithm=hashes.SHA512()),
-                    algorithm=hashes.SHA512(),
-                    label=None
-                )
-            )
-            encrypted_chunks.append(encrypted_chunk)
+        public_key = master_key_manager.public_key
+        encrypted_chunks = [public_key.encrypt(chunk, _OAEP_SHA512) for chunk in chunks]
         
         # 添加块数量信息
         num_chunks = len(encrypted_chunks).to_bytes(2, 'big')
@@ -292,48 +523,39 @@ class RSAEncryptor:
     @staticmethod
     def decrypt(encrypted: bytes) -> bytes:
         """RSA私钥解密"""
+        private_key = master_key_manager.private_key
+        if private_key is None:
+            raise ValueError("缺少RSA私钥，无法解密 1.0 版本密文")
+        
         # 提取块数量
         num_chunks = int.from_bytes(encrypted[:2], 'big')
         
         # 每个加密块的大小是512字节（4096位）
         chunk_size = 512
-        chunks = []
-        
-        offset = 2
-        for _ in range(num_chunks):
-            chunk = encrypted[offset:offset+chunk_size]
-            decrypted_chunk = master_key_manager.private_key.decrypt(
-                chunk,
-                asym_padding.OAEP(
-                    mgf=asym_padding.MGF1(algorithm=hashes.SHA512()),
-                    algorithm=hashes.SHA512(),
-                    label=None
-                )
-            )
-            chunks.append(decrypted_chunk)
-            offset += chunk_size
+        chunks = [
+            encrypted[offset:offset+chunk_size]
+            for offset in range(2, 2 + num_chunks * chunk_size, chunk_size)
+        ]
         
-        return b''.join(chunks)
+        return b''.join(private_key.decrypt(chunk, _OAEP_SHA512) for chunk in chunks)
 
 # ============================================================================
 # 第4层：Fernet双重加密
 # ============================================================================
 
 class FernetDoubleEncryptor:
-    """Fernet双重加密器"""
+    """Fernet双重加密器（密钥随密文一起保存）"""
     
     @staticmethod
     def encrypt(data: bytes) -> Tuple[bytes, bytes, bytes]:
         """双重Fernet加密"""
         # 第一层Fernet
         key1 = Fernet.generate_key()
-        f1 = Fernet(key1)
-        encrypted1 = f1.encrypt(data)
+        encrypted1 = Fernet(key1).encrypt(data)
         
         # 第二层Fernet
         key2 = Fernet.generate_key()
-        f2 = Fernet(key2)
-        encrypted2 = f2.encrypt(encrypted1)
+        encrypted2 = Fernet(key2).encrypt(encrypted1)
         
         return encrypted2, key1, key2
     
@@ -341,17 +563,13 @@ class FernetDoubleEncryptor:
     def decrypt(encrypted: bytes, key1: bytes, key2: bytes) -> bytes:
         """双重Fernet解密"""
         # 解密第二层
-        f2 = Fernet(key2)
-        decrypted1 = f2.decrypt(encrypted)
+        decrypted1 = Fernet(key2).decrypt(encrypted)
         
         # 解密第一层
-        f1 = Fernet(key1)
-        original = f1.decrypt(decrypted1)
-        
-        return original
+        return Fernet(key1).decrypt(decrypted1)
 
 # ============================================================================
-# 第5层：HMAC完整性校验
+# 第5层：完整性校验（Poly1305；旧版本为HMAC-SHA512）
 # ============================================================================
 
 class HMACValidator:
@@ -365,9 +583,34 @@ class HMACValidator:
     @staticmethod
     def verify(data: bytes, signature: bytes, key: bytes) -> bool:
         """验证HMAC签名"""
-        expected = hmac.new(key, data, hashlib.sha512).digest()
+        expected = HMACValidator.sign(data, key)
         return hmac.compare_digest(expected, signature)
 
+
+class Poly1305Validator:
+    """
+    Poly1305完整性验证器
+    
+    Poly1305 是一次性认证器，同一密钥只能用于一条消息；
+    这里的密钥由每条记录独立的随机盐值展开，满足该要求
+    """
+    
+    KEY_SIZE = 32
+    
+    @staticmethod
+    def sign(data: bytes, key: bytes) -> bytes:
+        """生成Poly1305标签"""
+        return Poly1305.generate_tag(key, data)
+    
+    @staticmethod
+    def verify(data: bytes, signature: bytes, key: bytes) -> bool:
+        """验证Poly1305标签（常数时间比较）"""
+        try:
+            Poly1305.verify_tag(key, data, signature)
+        except InvalidSignature:
+            return False
+        return True
+
 # ============================================================================
 # 超安全加密器（7层加密）
 # ============================================================================
@@ -376,29 +619,47 @@ class UltraSecureEncryption:
     """
     超安全加密器
     
-    加密流程：
+    加密流程（3.0）：
     原始数据 
-    → [1] 自定义混淆 
+    → [1] 按记录盐值展开 AES 密钥
     → [2] AES-256-GCM加密 
-    → [3] RSA-4096加密 
-    → [4] Fernet双重加密 
-    → [5] 再次自定义混淆 
-    → [6] Base85编码 
-    → [7] HMAC签名
+    → [3] X25519 + ChaCha20-Poly1305 信封加密
     → 存储到数据库
+    
+    两层均为认证加密，篡改密文或盐值都会导致解密失败，不再需要单独的签名层；
+    旧版7层格式（1.0/2.0）仍可解密
     """
     
+    # 旧版7层格式：1.0 第3层为RSA-4096；2.0 第3层为X25519 + ChaCha20-Poly1305
+    LEGACY_VERSION = "1.0"
+    LAYERED_VERSIONS = ("1.0", "2.0")
+    
+    # 以下标记仅出现在 2.0 格式中
+    # 记录密钥派生方式：HKDF-Expand，未标记的旧密文按盐值逐条 PBKDF2 派生
+    KDF_EXPAND = "hkdf-expand"
+    
+    # AES层序列化格式：定长二进制帧 iv(12) + tag(16) + ciphertext，未标记的旧密文为JSON
+    AES_FORMAT_BINARY = "binary"
+    
+    # 第6层编码：Base64，未标记的旧密文为Base85
+    ENCODING_BASE64 = "base64"
+    
+    # 第7层签名算法：Poly1305，未标记的旧密文为HMAC-SHA512
+    MAC_POLY1305 = "poly1305"
+    
     def __init__(self):
-        self.version = "1.0"
+        self.version = "3.0"
         self.obfuscator = CustomObfuscator()
         self.aes = AESEncryptor()
+        self.envelope = X25519Encryptor()
         self.rsa = RSAEncryptor()
         self.fernet = FernetDoubleEncryptor()
         self.hmac = HMACValidator()
+        self.poly1305 = Poly1305Validator()
     
     def encrypt(self, plaintext: str) -> str:
         """
-        7层加密
+        加密
         
         Args:
             plaintext: 明文（API密钥等）
@@ -412,69 +673,54 @@ class UltraSecureEncryption:
             # 生成唯一盐值
             salt = secrets.token_bytes(32)
             
-            # 派生AES密钥
-            aes_key = master_key_manager.derive_key(salt)
-            
-            # 【第1层】自定义混淆
-            print("  [1/7] 应用自定义混淆...")
-            obfuscated1 = self.obfuscator.obfuscate(data)
-            
-            # 【第2层】AES-256-GCM加密
-            print("  [2/7] AES-256-GCM加密...")
-            aes_encrypted = self.aes.encrypt(obfuscated1, aes_key)
+            # 【第1层】派生AES密钥
+            logger.debug("  [1/3] 派生记录密钥...")
+            aes_key, _ = master_key_manager.expand_record_keys(salt)
             
-            # 序列化AES加密结果
-            aes_data = json.dumps({
-                'iv': base64.b64encode(aes_encrypted['iv']).decode(),
-                'ciphertext': base64.b64encode(aes_encrypted['ciphertext']).decode(),
-                'tag': base64.b64encode(aes_encrypted['tag']).decode()
-            }).encode()
+            # 【第2层】AES-256-GCM加密，序列化为定长二进制帧 iv(12) + tag(16) + ciphertext
+            logger.debug("  [2/3] AES-256-GCM加密...")
+            aes_encrypted = self.aes.encrypt(data, aes_key)
+            aes_data = aes_encrypted['iv'] + aes_encrypted['tag'] + aes_encrypted['ciphertext']
             
-            # 【第3层】RSA-4096加密（加密AES数据）
-            print("  [3/7] RSA-4096加密...")
-            rsa_encrypted = self.rsa.encrypt(aes_data)
-            
-            # 【第4层】Fernet双重加密
-            print("  [4/7] Fernet双重加密...")
-            fernet_encrypted, fernet_key1, fernet_key2 = self.fernet.encrypt(rsa_encrypted)
-            
-            # 【第5层】再次自定义混淆
-            print("  [5/7] 再次混淆...")
-            obfuscated2 = self.obfuscator.obfuscate(fernet_encrypted)
-            
-            # 【第6层】Base85编码
-            print("  [6/7] Base85编码...")
-            base85_encoded = base64.b85encode(obfuscated2)
-            
-            # 【第7层】HMAC签名
-            print("  [7/7] HMAC签名...")
-            hmac_key = master_key_manager.derive_key(salt, length=64)
-            signature = self.hmac.sign(base85_encoded, hmac_key)
+            # 【第3层】X25519 + ChaCha20-Poly1305加密（加密AES数据）
+            logger.debug("  [3/3] X25519 + ChaCha20-Poly1305加密...")
+            envelope_encrypted = self.envelope.encrypt(aes_data)
             
             # 组装最终数据包
             final_package = {
                 'version': self.version,
                 'salt': base64.b64encode(salt).decode(),
-                'fernet_key1': base64.b64encode(fernet_key1).decode(),
-                'fernet_key2': base64.b64encode(fernet_key2).decode(),
-                'data': base85_encoded.decode(),
-                'signature': base64.b64encode(signature).decode(),
+                'data': _b64encode(envelope_encrypted).decode(),
                 'timestamp': datetime.utcnow().isoformat()
             }
             
             # 转换为JSON字符串
-            result = json.dumps(final_package)
+            result = orjson.dumps(final_package).decode()
             
-            print(f"✅ 加密完成！数据大小: {len(plaintext)} → {len(result)} 字节")
+            logger.debug("✅ 加密完成！数据大小: %d → %d 字节", len(plaintext), len(result))
             return result
             
         except Exception as e:
-            print(f"❌ 加密失败: {e}")
+            logger.error("❌ 加密失败: %s", e)
             raise
     
+    def encrypt_many(self, plaintexts: List[str]) -> List[str]:
+        """
+        批量加密（结果顺序与输入一致）
+        
+        每条记录仍使用独立盐值和AES密钥，批次内共享信封密钥；
+        OpenSSL 调用会释放 GIL，因此用线程池并行
+        """
+        if len(plaintexts) <= 1:
+            return [self.encrypt(plaintext) for plaintext in plaintexts]
+        
+        max_workers = min(len(plaintexts), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.encrypt, plaintexts))
+    
     def decrypt(self, encrypted: str) -> str:
         """
-        7层解密
+        解密（兼容旧版7层格式）
         
         Args:
             encrypted: 加密字符串
@@ -484,66 +730,115 @@ class UltraSecureEncryption:
         """
         try:
             # 解析数据包
-            package = json.loads(encrypted)
+            package = orjson.loads(encrypted)
             
             # 验证版本
-            if package['version'] != self.version:
-                raise ValueError(f"加密版本不匹配: {package['version']} != {self.version}")
+            version = package['version']
+            if version == self.version:
+                plaintext_bytes = self._decrypt_compact(package)
+            elif version in self.LAYERED_VERSIONS:
+                plaintext_bytes = self._decrypt_layered(package, version)
+            else:
+                raise ValueError(f"加密版本不匹配: {version} != {self.version}")
             
-            # 提取数据
-            salt = base64.b64decode(package['salt'])
-            fernet_key1 = base64.b64decode(package['fernet_key1'])
-            fernet_key2 = base64.b64decode(package['fernet_key2'])
-            data = package['data'].encode()
-            signature = base64.b64decode(package['signature'])
+            plaintext = plaintext_bytes.decode('utf-8')
             
-            # 【第7层】验证HMAC签名
-            print("  [7/7] 验证HMAC签名...")
-            hmac_key = master_key_manager.derive_key(salt, length=64)
-            if not self.hmac.verify(data, signature, hmac_key):
-                raise ValueError("数据完整性校验失败！数据可能被篡改！")
+            logger.debug("✅ 解密完成！")
+            return plaintext
             
-            # 【第6层】Base85解码
-            print("  [6/7] Base85解码...")
+        except Exception as e:
+            logger.error("❌ 解密失败: %s", e)
+            raise
+    
+    def _decrypt_compact(self, package: Dict[str, Any]) -> bytes:
+        """解密 3.0 格式"""
+        salt = base64.b64decode(package['salt'])
+        envelope_encrypted = _b64decode(package['data'])
+        
+        # 【第3层】信封解密
+        logger.debug("  [3/3] X25519 + ChaCha20-Poly1305解密...")
+        aes_data = self.envelope.decrypt(envelope_encrypted)
+        
+        # 【第2层】AES-256-GCM解密
+        logger.debug("  [2/3] AES-256-GCM解密...")
+        aes_key, _ = master_key_manager.expand_record_keys(salt)
+        return self.aes.decrypt(
+            {'iv': aes_data[:12], 'tag': aes_data[12:28], 'ciphertext': aes_data[28:]},
+            aes_key
+        )
+    
+    def _decrypt_layered(self, package: Dict[str, Any], version: str) -> bytes:
+        """7层解密（1.0/2.0 格式）"""
+        # 提取数据
+        salt = base64.b64decode(package['salt'])
+        fernet_key1 = base64.b64decode(package['fernet_key1'])
+        fernet_key2 = base64.b64decode(package['fernet_key2'])
+        data = package['data'].encode()
+        signature = base64.b64decode(package['signature'])
+        
+        # 派生AES密钥和HMAC密钥
+        if package.get('kdf') == self.KDF_EXPAND:
+            aes_key, hmac_key = master_key_manager.expand_record_keys(salt)
+        else:
+            aes_key = master_key_manager.derive_key(salt)
+            hmac_key = master_key_manager.derive_key(salt, length=64)
+        
+        # 【第7层】验证签名
+        if package.get('mac') == self.MAC_POLY1305:
+            logger.debug("  [7/7] 验证Poly1305签名...")
+            valid = self.poly1305.verify(data, signature, hmac_key[:Poly1305Validator.KEY_SIZE])
+        else:
+            logger.debug("  [7/7] 验证HMAC签名...")
+            valid = self.hmac.verify(data, signature, hmac_key)
+        if not valid:
+            raise ValueError("数据完整性校验失败！数据可能被篡改！")
+        
+        # 【第6层】解码
+        if package.get('encoding') == self.ENCODING_BASE64:
+            logger.debug("  [6/7] Base64解码...")
+            obfuscated2 = _b64decode(data)
+        else:
+            logger.debug("  [6/7] Base85解码...")
             obfuscated2 = base64.b85decode(data)
-            
-            # 【第5层】反混淆
-            print("  [5/7] 反混淆...")
-            fernet_encrypted = self.obfuscator.deobfuscate(obfuscated2)
-            
-            # 【第4层】Fernet双重解密
-            print("  [4/7] Fernet双重解密...")
-            rsa_encrypted = self.fernet.decrypt(fernet_encrypted, fernet_key1, fernet_key2)
-            
-            # 【第3层】RSA-4096解密
-            print("  [3/7] RSA-4096解密...")
-            aes_data = self.rsa.decrypt(rsa_encrypted)
-            
-            # 反序列化AES数据
-            aes_dict = json.loads(aes_data.decode())
+        
+        # 【第5层】反混淆
+        logger.debug("  [5/7] 反混淆...")
+        fernet_encrypted = self.obfuscator.deobfuscate(obfuscated2)
+        
+        # 【第4层】Fernet双重解密
+        logger.debug("  [4/7] Fernet双重解密...")
+        envelope_encrypted = self.fernet.decrypt(fernet_encrypted, fernet_key1, fernet_key2)
+        
+        # 【第3层】信封解密
+        if version == self.LEGACY_VERSION:
+            logger.debug("  [3/7] RSA-4096解密...")
+            aes_data = self.rsa.decrypt(envelope_encrypted)
+        else:
+            logger.debug("  [3/7] X25519 + ChaCha20-Poly1305解密...")
+            aes_data = self.envelope.decrypt(envelope_encrypted)
+        
+        # 反序列化AES数据
+        if package.get('aes_format') == self.AES_FORMAT_BINARY:
+            aes_encrypted = {
+                'iv': aes_data[:12],
+                'tag': aes_data[12:28],
+                'ciphertext': aes_data[28:]
+            }
+        else:
+            aes_dict = orjson.loads(aes_data)
             aes_encrypted = {
                 'iv': base64.b64decode(aes_dict['iv']),
                 'ciphertext': base64.b64decode(aes_dict['ciphertext']),
                 'tag': base64.b64decode(aes_dict['tag'])
             }
-            
-            # 【第2层】AES-256-GCM解密
-            print("  [2/7] AES-256-GCM解密...")
-            aes_key = master_key_manager.derive_key(salt)
-            obfuscated1 = self.aes.decrypt(aes_encrypted, aes_key)
-            
-            # 【第1层】反混淆
-            print("  [1/7] 反混淆...")
-            plaintext_bytes = self.obfuscator.deobfuscate(obfuscated1)
-            
-            plaintext = plaintext_bytes.decode('utf-8')
-            
-            print(f"✅ 解密完成！")
-            return plaintext
-            
-        except Exception as e:
-            print(f"❌ 解密失败: {e}")
-            raise
+        
+        # 【第2层】AES-256-GCM解密
+        logger.debug("  [2/7] AES-256-GCM解密...")
+        obfuscated1 = self.aes.decrypt(aes_encrypted, aes_key)
+        
+        # 【第1层】反混淆
+        logger.debug("  [1/7] 反混淆...")
+        return self.obfuscator.deobfuscate(obfuscated1)
 
 # ============================================================================
 # 全局实例
@@ -557,19 +852,46 @@ ultra_crypto = UltraSecureEncryption()
 
 def encrypt_api_key(api_key: str) -> str:
     """加密API密钥"""
-    print(f"\n🔐 开始加密 API 密钥...")
+    logger.debug("🔐 开始加密 API 密钥...")
     return ultra_crypto.encrypt(api_key)
 
+async def encrypt_api_key_async(api_key: str) -> str:
+    """
+    加密API密钥（在工作线程中执行）
+    
+    首次加密需完成一次 PBKDF2 派生，放到线程中执行避免阻塞事件循环
+    """
+    return await asyncio.to_thread(encrypt_api_key, api_key)
+
+def encrypt_api_keys(api_keys: List[str]) -> List[str]:
+    """批量加密API密钥（数据迁移、批量轮换等场景）"""
+    logger.debug("🔐 开始批量加密 %d 个 API 密钥...", len(api_keys))
+    return ultra_crypto.encrypt_many(api_keys)
+
+@functools.lru_cache(maxsize=512)
 def decrypt_api_key(encrypted: str) -> str:
-    """解密API密钥"""
-    print(f"\n🔓 开始解密 API 密钥...")
+    """
+    解密API密钥
+    
+    同一密文的解密结果固定，结果按密文缓存；轮换主密钥后需调用
+    decrypt_api_key.cache_clear()
+    """
+    logger.debug("🔓 开始解密 API 密钥...")
     return ultra_crypto.decrypt(encrypted)
 
+async def decrypt_api_key_async(encrypted: str) -> str:
+    """解密API密钥（在工作线程中执行，避免阻塞事件循环）"""
+    return await asyncio.to_thread(decrypt_api_key, encrypted)
+
 # ============================================================================
 # 测试代码
 # ============================================================================
 
 if __name__ == "__main__":
+    # 测试时输出逐层加解密进度
+    logging.basicConfig(format="%(message)s")
+    logger.setLevel(logging.DEBUG)
+    
     print("=" * 80)
     print("🔒 超安全加密系统测试")
     print("=" * 80)
@@ -603,13 +925,10 @@ if __name__ == "__main__":
         
         # 安全特性
         print(f"\n🔐 安全特性:")
-        print(f"  • 7层加密保护")
         print(f"  • AES-256-GCM对称加密")
-        print(f"  • RSA-4096非对称加密")
-        print(f"  • PBKDF2密钥派生 (100,000次迭代)")
-        print(f"  • Fernet双重加密")
-        print(f"  • HMAC-SHA512完整性校验")
-        print(f"  • 自定义混淆算法")
+        print(f"  • X25519 + ChaCha20-Poly1305信封加密")
+        print(f"  • PBKDF2 + HKDF密钥派生 (100,000次迭代)")
+        print(f"  • 双层认证加密完整性校验")
         print(f"  • 数据膨胀率: {len(encrypted) / len(original):.1f}x")
     
     print(f"\n{'='*80}")
@@ -5,12 +5,17 @@ WebSocket 实时推送 API
 
 from fastapi import WebSocket, WebSocketDisconnect, Depends, HTTPException, status
 from fastapi import APIRouter
-from typing import Dict, Set, Optional
+from typing import Dict, Set, Optional, Tuple, Union
+from collections import OrderedDict, defaultdict
 import asyncio
-import json
+import hashlib
 import logging
+import time
 from datetime import datetime
 
+import msgspec
+from jose import jwt, JWTError
+
 from api_auth import verify_token_ws
 from trading_system_multi_user_manager import get_multi_user_trading_manager
 
@@ -18,62 +23,251 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# 二进制帧协议：客户端在握手时声明子协议 "msgpack" 即使用 MessagePack 帧，否则回退为 JSON 文本帧
+MSGPACK_SUBPROTOCOL = "msgpack"
+_MP_DEC = msgspec.msgpack.Decoder(dict)
+_JSON_DEC = msgspec.json.Decoder(dict)
+
+# 待发送消息：普通字典，或下方预定义的事件结构体（msgspec 按结构体定义直接编码）
+Message = Union[dict, msgspec.Struct]
+
+# 数据未变化时跳过推送，但最长每隔该秒数强制推送一次，便于丢帧的客户端重新同步
+FORCE_RESYNC_INTERVAL = 5.0
+
+# 发送端：每个连接一个有界队列，由独立的写任务依次发送；单帧发送超时（秒）视为连接失效
+SEND_QUEUE_SIZE = 256
+SEND_TIMEOUT = 5.0
+# 实时数据只在队列积压少于该帧数时入队，积压时跳过并在下个周期补发完整快照
+REALTIME_BACKLOG = 8
+# 用户没有运行中的交易系统时，在该秒数内不再查询其状态
+STATUS_MISS_TTL = 5.0
+
+# ============================================================================
+# 实时数据帧模板
+# ============================================================================
+
+class _FrameTemplate:
+    """
+    固定结构的推送帧 {"event": <event>, "data": {<field>: <内容>, "timestamp": <时间戳>}}
+    
+    事件名和键名预先编码为字节前缀，推送时只拼接已编码的内容和时间戳，不再构造字典交给编码器遍历
+    """
+    
+    __slots__ = ("mp_prefix", "json_prefix")
+    
+    def __init__(self, event: str, field: str):
+        mp, js = msgspec.msgpack.encode, msgspec.json.encode
+        # 0x82: 两个键值对的 msgpack map
+        self.mp_prefix = b"\x82" + mp("event") + mp(event) + mp("data") + b"\x82" + mp(field)
+        self.json_prefix = b'{"event":' + js(event) + b',"data":{' + js(field) + b":"
+    
+    def msgpack(self, blob: bytes, ts: bytes) -> bytes:
+        return self.mp_prefix + blob + _MP_TIMESTAMP_KEY + ts
+    
+    def json(self, blob: bytes, ts: bytes) -> bytes:
+        return self.json_prefix + blob + b',"timestamp":' + ts + b"}}"
+
+
+_MP_TIMESTAMP_KEY = msgspec.msgpack.encode("timestamp")
+_MP_BATCH_PREFIX = b"\x82" + msgspec.msgpack.encode("event") + msgspec.msgpack.encode("batch") + msgspec.msgpack.encode("events")
+_POSITIONS_FRAME = _FrameTemplate("positions_update", "positions")
+_STATUS_FRAME = _FrameTemplate("status_update", "status")
+
+
+def _batch_msgpack(frames: list) -> bytes:
+    """合并为 {"event": "batch", "events": [...]}（0x90 | n: 少于16个元素的 msgpack array）"""
+    return _MP_BATCH_PREFIX + bytes((0x90 | len(frames),)) + b"".join(frames)
+
+
+def _batch_json(frames: list) -> bytes:
+    return b'{"event":"batch","events":[' + b",".join(frames) + b"]}"
+
+
 # ============================================================================
 # WebSocket 连接管理器
 # ============================================================================
 
+class ClientPusher:
+    """
+    单个连接的写任务
+    
+    所有发往该连接的帧都先进入有界队列，再由本任务依次发送；
+    生产者只做 put_nowait，慢客户端不会阻塞推送循环或其他连接
+    """
+    
+    def __init__(self, websocket: WebSocket, user_id: str):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.task = asyncio.create_task(self.run())
+    
+    async def run(self):
+        try:
+            while True:
+                frame = await self.queue.get()
+                await asyncio.wait_for(manager.send_frame(self.websocket, frame), SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            logger.info(f"用户 {self.user_id} 的数据推送任务已取消")
+        except Exception as e:
+            logger.error(f"推送数据失败: {e!r}")
+            manager.drop(self.websocket, self.user_id)
+
+
 class ConnectionManager:
     """管理所有WebSocket连接"""
     
     def __init__(self):
-        # user_id -> Set[WebSocket]
-        self.active_connections: Dict[str, Set[WebSocket]] = {}
+        # user_id -> Set[WebSocket]（集合保证断开时 O(1) 移除；用户最后一个连接断开时删除其条目）
+        self.active_connections: Dict[str, Set[WebSocket]] = defaultdict(set)
+        # 协商了 msgpack 子协议的连接
+        self.msgpack_connections: Set[WebSocket] = set()
+        # WebSocket -> 该连接的写任务（同时是全部连接的索引，广播时直接遍历）
+        self._pushers: Dict[WebSocket, ClientPusher] = {}
+        # 需要在下个周期下发完整快照的用户（新连接、实时帧被跳过）
+        self._resync_users: Set[str] = set()
+        # user_id -> 在此时间（time.monotonic）之前跳过状态查询（无运行中的交易系统）
+        self._user_status_miss_until: Dict[str, float] = {}
         self._lock = asyncio.Lock()
+        # 复用编码器（encode 为同步调用，不会跨 await 重入）
+        self._enc = msgspec.msgpack.Encoder()
+        self._json_enc = msgspec.json.Encoder()
     
     async def connect(self, websocket: WebSocket, user_id: str):
-        """连接WebSocket"""
-        await websocket.accept()
+        """连接WebSocket（客户端声明 msgpack 子协议时使用二进制帧）"""
+        if MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", ()):
+            await websocket.accept(subprotocol=MSGPACK_SUBPROTOCOL)
+            self.msgpack_connections.add(websocket)
+        else:
+            await websocket.accept()
         
         async with self._lock:
-            if user_id not in self.active_connections:
-                self.active_connections[user_id] = set()
             self.active_connections[user_id].add(websocket)
+            self._pushers[websocket] = ClientPusher(websocket, user_id)
+            self._resync_users.add(user_id)
+            self._user_status_miss_until.pop(user_id, None)
+        _ensure_broadcaster()
         
         logger.info(f"✅ 用户 {user_id} 的WebSocket已连接，当前连接数: {len(self.active_connections[user_id])}")
     
     async def disconnect(self, websocket: WebSocket, user_id: str):
         """断开WebSocket"""
         async with self._lock:
-            if user_id in self.active_connections:
-                self.active_connections[user_id].discard(websocket)
-                if not self.active_connections[user_id]:
-                    del self.active_connections[user_id]
+            self._remove(websocket, user_id)
         
         logger.info(f"❌ 用户 {user_id} 的WebSocket已断开")
     
-    async def send_to_user(self, user_id: str, message: dict):
-        """发送消息给指定用户的所有连接"""
-        if user_id not in self.active_connections:
+    def _remove(self, websocket: WebSocket, user_id: str):
+        """从管理器中移除连接并停止其写任务"""
+        connections = self.active_connections.get(user_id)
+        if connections is not None:
+            connections.discard(websocket)
+            if not connections:
+                del self.active_connections[user_id]
+                self._user_status_miss_until.pop(user_id, None)
+        self.msgpack_connections.discard(websocket)
+        pusher = self._pushers.pop(websocket, None)
+        if pusher is not None and pusher.task is not asyncio.current_task():
+            pusher.task.cancel()
+    
+    def drop(self, websocket: WebSocket, user_id: str):
+        """移除失效或过慢的连接并关闭它（接收循环随之结束）"""
+        if websocket not in self._pushers:
             return
+        self._remove(websocket, user_id)
+        asyncio.create_task(self._close(websocket))
+    
+    async def _close(self, websocket: WebSocket):
+        try:
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        except Exception:
+            pass
+    
+    def encode(self, websocket: WebSocket, message: Message) -> Union[bytes, str]:
+        """按连接协商的协议编码消息（msgpack 为 bytes，JSON 为 str）"""
+        if websocket in self.msgpack_connections:
+            return self._enc.encode(message)
+        return self._json_enc.encode(message).decode()
+    
+    def encode_frames(self, message: Message) -> Tuple[bytes, str]:
+        """同时编码为 msgpack 帧和 JSON 帧（用于广播）"""
+        return self._enc.encode(message), self._json_enc.encode(message).decode()
+    
+    async def send_frame(self, websocket: WebSocket, frame: Union[bytes, str]):
+        """发送已编码的帧"""
+        if isinstance(frame, bytes):
+            await websocket.send_bytes(frame)
+        else:
+            await websocket.send_text(frame)
+    
+    def enqueue(self, websocket: WebSocket, frame: Union[bytes, str]):
+        """将帧放入连接的发送队列；队列已满说明客户端长期跟不上，直接断开"""
+        pusher = self._pushers.get(websocket)
+        if pusher is None:
+            return
+        try:
+            pusher.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            logger.warning(f"用户 {pusher.user_id} 的发送队列已满，断开慢客户端")
+            self.drop(websocket, pusher.user_id)
+    
+    async def send(self, websocket: WebSocket, message: Message):
+        """按连接协商的协议发送单条消息"""
+        self.enqueue(websocket, self.encode(websocket, message))
+    
+    def _frames_for_user(self, user_id: str, message: Message):
+        """生成 (websocket, frame)，每种协议只编码一次，同一用户的多个标签页共享编码结果"""
+        encoded: Dict[bool, Union[bytes, str]] = {}
+        for websocket in list(self.active_connections.get(user_id, ())):
+            binary = websocket in self.msgpack_connections
+            frame = encoded.get(binary)
+            if frame is None:
+                frame = encoded[binary] = self.encode(websocket, message)
+            yield websocket, frame
+    
+    def has_json_connections(self, user_id: str) -> bool:
+        """该用户是否有使用 JSON 文本帧的连接"""
+        return any(websocket not in self.msgpack_connections for websocket in self.active_connections.get(user_id, ()))
+    
+    def publish(self, user_id: str, payload: bytes, text: Optional[str]):
+        """
+        推送已编码的实时数据到该用户所有连接（msgpack 连接发送 payload，JSON 连接发送 text）
         
-        disconnected = set()
-        
-        for websocket in self.active_connections[user_id]:
-            try:
-                await websocket.send_json(message)
-            except Exception as e:
-                logger.error(f"发送消息失败: {e}")
-                disconnected.add(websocket)
-        
-        # 清理断开的连接
-        if disconnected:
-            async with self._lock:
-                self.active_connections[user_id] -= disconnected
+        队列积压的连接跳过本帧（只会错过过期数据），并标记该用户在下个周期补发完整快照
+        """
+        for websocket in list(self.active_connections.get(user_id, ())):
+            frame = payload if websocket in self.msgpack_connections else text
+            pusher = self._pushers.get(websocket)
+            if pusher is not None and pusher.queue.qsize() >= REALTIME_BACKLOG:
+                self._resync_users.add(user_id)
+                continue
+            self.enqueue(websocket, frame)
+    
+    async def receive(self, websocket: WebSocket) -> dict:
+        """接收一条客户端消息（二进制帧按 msgpack 解码，文本帧按 JSON 解码）"""
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        if message.get("bytes") is not None:
+            return _MP_DEC.decode(message["bytes"])
+        return _JSON_DEC.decode(message["text"])
+    
+    async def send_to_user(self, user_id: str, message: Message):
+        """发送消息给指定用户的所有连接"""
+        for websocket, frame in self._frames_for_user(user_id, message):
+            self.enqueue(websocket, frame)
     
-    async def broadcast(self, message: dict):
+    async def broadcast(self, message: Message):
         """广播消息给所有用户"""
-        for user_id in list(self.active_connections.keys()):
-            await self.send_to_user(user_id, message)
+        await self.broadcast_bytes(*self.encode_frames(message))
+    
+    async def broadcast_bytes(self, payload: bytes, text: str):
+        """
+        广播预编码的消息给所有用户
+        
+        msgpack 连接发送 payload，JSON 连接发送 text，所有连接共享同一个对象，不再逐连接序列化
+        """
+        for websocket in list(self._pushers):
+            self.enqueue(websocket, payload if websocket in self.msgpack_connections else text)
     
     def get_connected_users(self) -> list:
         """获取所有已连接的用户ID"""
@@ -84,6 +278,41 @@ class ConnectionManager:
 manager = ConnectionManager()
 
 
+# ============================================================================
+# Token 验证
+# ============================================================================
+
+# 已验证 token 的缓存：sha256(token) -> (用户数据, 过期时间戳)，同一客户端重连时跳过签名校验
+TOKEN_CACHE_SIZE = 1024
+_verified_tokens: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+
+
+async def _verify_token(token: str) -> Optional[dict]:
+    """验证 WebSocket token：命中缓存且未过期时直接返回，否则在线程池中校验，不阻塞事件循环"""
+    key = hashlib.sha256(token.encode()).digest()
+    cached = _verified_tokens.get(key)
+    if cached is not None:
+        if cached[1] > time.time():
+            _verified_tokens.move_to_end(key)
+            return cached[0]
+        del _verified_tokens[key]
+    
+    user_data = await asyncio.get_running_loop().run_in_executor(None, verify_token_ws, token)
+    
+    # 只缓存带过期时间的有效 token
+    if user_data:
+        try:
+            exp = jwt.get_unverified_claims(token).get("exp")
+        except JWTError:
+            exp = None
+        if exp is not None:
+            _verified_tokens[key] = (user_data, float(exp))
+            if len(_verified_tokens) > TOKEN_CACHE_SIZE:
+                _verified_tokens.popitem(last=False)
+    
+    return user_data
+
+
 # ============================================================================
 # WebSocket 端点
 # ============================================================================
@@ -102,6 +331,10 @@ async def websocket_endpoint(
     - 持仓/盈亏/余额: 0.1秒（100ms）
     - 系统状态: 1秒
     - 交易事件: 即时推送
+    - 心跳: 服务器每30秒发送协议层 PING 帧（uvicorn ws_ping_interval），浏览器自动应答
+    
+    同一周期内持仓与系统状态同时更新时合并为一帧:
+    {"event": "batch", "events": [{"event": "positions_update", ...}, {"event": "status_update", ...}]}
     """
     
     # 验证token
@@ -111,7 +344,7 @@ async def websocket_endpoint(
     
     try:
         # 验证JWT token
-        user_data = verify_token_ws(token)
+        user_data = await _verify_token(token)
         if not user_data:
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return
@@ -129,7 +362,7 @@ async def websocket_endpoint(
     
     try:
         # 发送欢迎消息
-        await websocket.send_json({
+        await manager.send(websocket, {
             "event": "connected",
             "data": {
                 "user_id": user_id,
@@ -138,94 +371,153 @@ async def websocket_endpoint(
             }
         })
         
-        # 启动数据推送任务
-        push_task = asyncio.create_task(
-            push_realtime_data(websocket, user_id)
-        )
-        
-        # 监听客户端消息
+        # 监听客户端消息（心跳由服务器协议层 PING 帧负责，见 uvicorn ws_ping_interval）
         while True:
-            try:
-                data = await asyncio.wait_for(
-                    websocket.receive_text(),
-                    timeout=30.0  # 30秒超时
-                )
-                
-                # 处理客户端消息
-                message = json.loads(data)
-                await handle_client_message(websocket, user_id, message)
-                
-            except asyncio.TimeoutError:
-                # 发送心跳
-                await websocket.send_json({
-                    "event": "ping",
-                    "data": {"timestamp": datetime.now().isoformat()}
-                })
+            message = await manager.receive(websocket)
+            
+            # 处理客户端消息
+            await handle_client_message(websocket, user_id, message)
             
     except WebSocketDisconnect:
         logger.info(f"用户 {user_id} 主动断开连接")
     except Exception as e:
         logger.error(f"WebSocket错误: {e}")
     finally:
-        # 取消推送任务
-        if 'push_task' in locals():
-            push_task.cancel()
-        
-        # 断开连接
+        # 断开连接（同时停止该连接的写任务）
         await manager.disconnect(websocket, user_id)
 
 
-async def push_realtime_data(websocket: WebSocket, user_id: str):
+# 全局广播任务（有连接时运行，无连接时自动退出）
+_broadcaster_task: Optional[asyncio.Task] = None
+
+
+def _ensure_broadcaster():
+    """确保广播任务在运行"""
+    global _broadcaster_task
+    if _broadcaster_task is None or _broadcaster_task.done():
+        _broadcaster_task = asyncio.create_task(positions_broadcaster())
+
+
+def _should_push(last_sent: Dict[str, Tuple[bytes, float]], key: str, value, now: float) -> Optional[bytes]:
+    """
+    内容与上次推送相同且未到强制同步时间时返回 None，
+    否则记录本次推送并返回内容的 msgpack 编码（直接用于拼接推送帧）
+    """
+    encoded = manager._enc.encode(value)
+    previous = last_sent.get(key)
+    if previous is not None and previous[0] == encoded and now - previous[1] < FORCE_RESYNC_INTERVAL:
+        return None
+    last_sent[key] = (encoded, now)
+    return encoded
+
+
+def _build_frames(
+    user_last: Dict[str, Tuple[bytes, float]],
+    status: dict,
+    positions: list,
+    with_status: bool,
+    wants_json: bool,
+    ts_mp: bytes,
+    ts_json: bytes,
+    now: float
+) -> Optional[Tuple[bytes, Optional[str]]]:
+    """
+    生成用户本周期的推送帧 (msgpack 帧, JSON 帧)，没有需要推送的内容时返回 None
+    - 持仓每个周期检查，系统状态仅在 with_status 时检查（每1秒）
+    - 同一周期的多个事件合并为一帧
+    """
+    mp_frames, json_frames = [], []
+    
+    # 持仓更新
+    blob = _should_push(user_last, "positions", positions, now)
+    if blob is not None:
+        mp_frames.append(_POSITIONS_FRAME.msgpack(blob, ts_mp))
+        if wants_json:
+            json_frames.append(_POSITIONS_FRAME.json(manager._json_enc.encode(positions), ts_json))
+    
+    # 系统状态
+    blob = _should_push(user_last, "status", status, now) if with_status else None
+    if blob is not None:
+        mp_frames.append(_STATUS_FRAME.msgpack(blob, ts_mp))
+        if wants_json:
+            json_frames.append(_STATUS_FRAME.json(manager._json_enc.encode(status), ts_json))
+    
+    if not mp_frames:
+        return None
+    if len(mp_frames) == 1:
+        return mp_frames[0], json_frames[0].decode() if wants_json else None
+    return _batch_msgpack(mp_frames), _batch_json(json_frames).decode() if wants_json else None
+
+
+async def positions_broadcaster():
     """
-    推送实时数据
+    推送实时数据（所有连接共用一个生产者）
     - 持仓/盈亏/余额: 每0.1秒
     - 系统状态: 每1秒
+    
+    每个周期对每个已连接用户只读取一次状态和持仓，再分发到该用户所有连接的队列；
+    内容与上次推送相同时跳过（最长 FORCE_RESYNC_INTERVAL 秒强制推送一次）
     """
     
     multi_user_manager = get_multi_user_trading_manager()
     
     update_counter = 0
+    # user_id -> {"positions"/"status": (上次推送内容的编码结果, 推送时间)}
+    last_sent: Dict[str, Dict[str, Tuple[bytes, float]]] = {}
     
-    try:
-        while True:
-            update_counter += 1
+    # 按截止时间调度，处理耗时不会累加到推送周期上
+    loop = asyncio.get_running_loop()
+    next_tick = loop.time()
+    
+    while manager.active_connections:
+        update_counter += 1
+        # 本轮推送共用同一时间戳（按两种协议各编码一次）
+        timestamp = datetime.now().isoformat()
+        ts_mp = manager._enc.encode(timestamp)
+        ts_json = manager._json_enc.encode(timestamp)
+        now = time.monotonic()
+        
+        # 新连接需要立即收到完整快照
+        while manager._resync_users:
+            last_sent.pop(manager._resync_users.pop(), None)
+        
+        for user_id in manager.get_connected_users():
+            # 最近查询过且没有运行中的交易系统，暂不重复查询
+            miss_until = manager._user_status_miss_until.get(user_id)
+            if miss_until is not None and now < miss_until:
+                continue
             
-            # 每0.1秒推送持仓数据
+            # 只有读取快照和编码可能抛出异常，其余路径不进入 try
             try:
-                # 获取用户的交易系统状态
-                status = multi_user_manager.get_status_for_user(user_id)
-                
+                # 获取用户的交易系统状态和实时持仓
+                status, positions = multi_user_manager.get_snapshot_for_user(user_id)
                 if status:
-                    # 获取实时持仓
-                    positions = multi_user_manager.get_positions_for_user(user_id)
-                    
-                    # 推送持仓更新
-                    await websocket.send_json({
-                        "event": "positions_update",
-                        "data": {
-                            "positions": positions,
-                            "timestamp": datetime.now().isoformat()
-                        }
-                    })
-                    
-                    # 每1秒推送系统状态（10个周期）
-                    if update_counter % 10 == 0:
-                        await websocket.send_json({
-                            "event": "status_update",
-                            "data": {
-                                "status": status,
-                                "timestamp": datetime.now().isoformat()
-                            }
-                        })
-                
+                    frames = _build_frames(
+                        last_sent.setdefault(user_id, {}), status, positions,
+                        update_counter % 10 == 0, manager.has_json_connections(user_id),
+                        ts_mp, ts_json, now
+                    )
             except Exception as e:
-                logger.error(f"推送数据失败: {e}")
+                logger.error("推送数据失败: %s", e)
+                continue
             
-            # 等待0.1秒
-            await asyncio.sleep(0.1)
-            
-    except asyncio.CancelledError:
-        logger.info(f"用户 {user_id} 的数据推送任务已取消")
+            if not status:
+                manager._user_status_miss_until[user_id] = now + STATUS_MISS_TTL
+            elif frames is not None:
+                manager.publish(user_id, *frames)
+        
+        # 清理已断开用户的去重状态
+        for user_id in last_sent.keys() - manager.active_connections.keys():
+            del last_sent[user_id]
+        
+        # 等待到下一个0.1秒周期；落后时从当前时间重新计时，不补发积压的周期
+        next_tick += 0.1
+        delay = next_tick - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            next_tick = loop.time()
+            await asyncio.sleep(0)
 
 
 async def handle_client_message(websocket: WebSocket, user_id: str, message: dict):
@@ -252,71 +544,102 @@ async def handle_client_message(websocket: WebSocket, user_id: str, message: dic
 
 # ============================================================================
 # 事件推送函数（供其他模块调用）
+# 批量推送时可传入同一个 ts（ISO 时间字符串）复用时间戳，未传入时取当前时间
 # ============================================================================
 
-async def notify_trade_opened(user_id: str, trade: dict, position: dict):
+class _Event(msgspec.Struct, tag_field="event"):
+    """推送事件基类（编码为 {"event": <tag>, "data": {...}}，与字典格式一致）"""
+
+
+class TradeOpenedData(msgspec.Struct):
+    trade: dict
+    position: dict
+    timestamp: str
+
+
+class TradeOpenedEvent(_Event, tag="trade_opened"):
+    data: TradeOpenedData
+
+
+class TradeClosedEvent(_Event, tag="trade_closed"):
+    # 平仓数据字段不固定，保持字典
+    data: dict
+
+
+class AIDecisionData(msgspec.Struct):
+    decision: dict
+    timestamp: str
+
+
+class AIDecisionEvent(_Event, tag="ai_decision"):
+    data: AIDecisionData
+
+
+class BalanceUpdatedData(msgspec.Struct):
+    balance: float
+    timestamp: str
+
+
+class BalanceUpdatedEvent(_Event, tag="balance_updated"):
+    data: BalanceUpdatedData
+
+
+class SystemStatusChangedData(msgspec.Struct):
+    status: dict
+    timestamp: str
+
+
+class SystemStatusChangedEvent(_Event, tag="system_status_changed"):
+    data: SystemStatusChangedData
+
+
+async def notify_trade_opened(user_id: str, trade: dict, position: dict, ts: Optional[str] = None):
     """通知新交易开仓"""
-    await manager.send_to_user(user_id, {
-        "event": "trade_opened",
-        "data": {
-            "trade": trade,
-            "position": position,
-            "timestamp": datetime.now().isoformat()
-        }
-    })
+    await manager.send_to_user(user_id, TradeOpenedEvent(
+        TradeOpenedData(trade, position, ts or datetime.now().isoformat())
+    ))
 
 
-async def notify_trade_closed(user_id: str, trade_id: str, close_data: dict):
+async def notify_trade_closed(user_id: str, trade_id: str, close_data: dict, ts: Optional[str] = None):
     """通知交易平仓"""
-    await manager.send_to_user(user_id, {
-        "event": "trade_closed",
-        "data": {
-            "trade_id": trade_id,
-            **close_data,
-            "timestamp": datetime.now().isoformat()
-        }
-    })
+    await manager.send_to_user(user_id, TradeClosedEvent({
+        "trade_id": trade_id,
+        **close_data,
+        "timestamp": ts or datetime.now().isoformat()
+    }))
 
 
-async def notify_ai_decision(user_id: str, decision: dict):
+async def notify_ai_decision(user_id: str, decision: dict, ts: Optional[str] = None):
     """通知新的AI决策"""
-    await manager.send_to_user(user_id, {
-        "event": "ai_decision",
-        "data": {
-            "decision": decision,
-            "timestamp": datetime.now().isoformat()
-        }
-    })
+    await manager.send_to_user(user_id, AIDecisionEvent(
+        AIDecisionData(decision, ts or datetime.now().isoformat())
+    ))
 
 
-async def notify_balance_update(user_id: str, balance: float):
+async def notify_balance_update(user_id: str, balance: float, ts: Optional[str] = None):
     """通知余额更新"""
-    await manager.send_to_user(user_id, {
-        "event": "balance_updated",
-        "data": {
-            "balance": balance,
-            "timestamp": datetime.now().isoformat()
-        }
-    })
+    await manager.send_to_user(user_id, BalanceUpdatedEvent(
+        BalanceUpdatedData(balance, ts or datetime.now().isoformat())
+    ))
 
 
-async def notify_system_status_changed(user_id: str, status: dict):
+async def notify_system_status_changed(user_id: str, status: dict, ts: Optional[str] = None):
     """通知系统状态变化"""
-    await manager.send_to_user(user_id, {
-        "event": "system_status_changed",
-        "data": {
-            "status": status,
-            "timestamp": datetime.now().isoformat()
-        }
-    })
-
-
-async def notify_all_users(event: str, data: dict):
-    """通知所有用户"""
-    await manager.broadcast({
+    # 状态已变化，下个周期重新查询
+    manager._user_status_miss_until.pop(user_id, None)
+    await manager.send_to_user(user_id, SystemStatusChangedEvent(
+        SystemStatusChangedData(status, ts or datetime.now().isoformat())
+    ))
+
+
+async def notify_all_users(event: str, data: dict, ts: Optional[str] = None):
+    """通知所有用户（只编码一次，所有连接共享编码结果）"""
+    message = {
         "event": event,
-        "data": data
-    })
+        "data": data,
+        "timestamp": ts or datetime.now().isoformat()
+    }
+    await manager.broadcast_bytes(*manager.encode_frames(message))
 
 
 # ============================================================================